@@ -0,0 +1,104 @@
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+
+# Раунд не короче этого времени, чтобы точность таймера не искажала замер.
+MIN_ROUND_TIME = 0.005
+MAX_ITERATIONS = 1_000_000
+
+
+def calibrate(func, min_time=MIN_ROUND_TIME):
+    """Число вызовов в раунде, при котором раунд длится не меньше
+    min_time.
+    """
+    iterations = 1
+    while iterations < MAX_ITERATIONS:
+        if timed(func, iterations) >= min_time:
+            break
+        iterations *= 2
+    return iterations
+
+
+def timed(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter() - started
+
+
+def measure(func, rounds=20, warmup=1, min_time=MIN_ROUND_TIME):
+    """Статистика времени одного вызова func в секундах.
+
+    Каждый раунд вызывает func несколько раз подряд; сборщик мусора на
+    время раундов отключается, чтобы паузы сборки не попадали в замер.
+    """
+    for _ in range(warmup):
+        func()
+    iterations = calibrate(func, min_time)
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        samples = [
+            timed(func, iterations) / iterations for _ in range(rounds)
+        ]
+    finally:
+        if enabled:
+            gc.enable()
+    return {
+        'min': min(samples),
+        'max': max(samples),
+        'mean': statistics.mean(samples),
+        'median': statistics.median(samples),
+        'stddev': statistics.stdev(samples) if rounds > 1 else 0.0,
+        'rounds': rounds,
+        'iterations': iterations,
+        'ops': 1 / statistics.median(samples),
+    }
+
+
+def machine():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'system': platform.platform(),
+        'processor': platform.machine(),
+    }
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)['benchmarks']
+
+
+def save_baseline(path, results, **info):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(
+            {'machine': machine(), **info, 'benchmarks': results},
+            output,
+            ensure_ascii=False,
+            indent=2,
+        )
+        output.write('\n')
+
+
+def compare(results, baseline, threshold):
+    """Изменение лучшего раунда относительно базовой линии.
+
+    Лучший раунд меньше всего зависит от посторонней нагрузки. Возвращает
+    словарь имя -> (доля изменения, регрессия ли это); замеры без базовой
+    линии пропускаются.
+    """
+    changes = {}
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        change = stats['min'] / baseline[name]['min'] - 1
+        changes[name] = (change, change > threshold)
+    return changes
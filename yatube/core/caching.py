@@ -0,0 +1,112 @@
+import os
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+WAIT_INTERVAL = 0.05
+# Каталог кэша просматривается для чистки не чаще раза в столько секунд.
+CULL_INTERVAL = 60
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    """Файловый кэш, общий для всех процессов сервера.
+
+    В отличие от встроенного, add атомарен: файл ключа создаётся жёсткой
+    ссылкой, которая не перезаписывает существующий файл. На этом
+    держатся блокировки get_or_compute.
+
+    Встроенный кэш перечисляет весь каталог при каждом set и при
+    переполнении удаляет случайные записи. Здесь каталог просматривается
+    не чаще раза в CULL_INTERVAL, сначала удаляются просроченные записи,
+    а случайные - только если просроченных не хватило.
+    """
+
+    _next_cull = 0
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.has_key(key, version):
+            return False
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            os.link(tmp_path, fname)
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+        return True
+
+    def _cull(self):
+        now = time.monotonic()
+        if now < self._next_cull:
+            return
+        self._next_cull = now + CULL_INTERVAL
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        alive = [fname for fname in filelist if not self._expired(fname)]
+        excess = len(alive) - self._max_entries * (
+            1 - 1 / self._cull_frequency
+        )
+        if excess > 0:
+            for fname in random.sample(alive, int(excess)):
+                self._delete(fname)
+
+    def _expired(self, fname):
+        """Удаляет просроченный файл записи; True, если его больше нет."""
+        try:
+            with open(fname, 'rb') as f:
+                return self._is_expired(f)
+        except FileNotFoundError:
+            return True
+
+
+def store(key, compute, timeout):
+    value = compute()
+    if timeout is None:
+        cache.set(key, (None, value), None)
+    else:
+        cache.set(
+            key,
+            (time.time() + timeout, value),
+            timeout + settings.CACHE_STALE_TIMEOUT
+        )
+    return value
+
+
+def get_or_compute(key, compute, timeout):
+    """Значение из кэша с пересчётом в одном процессе.
+
+    Пока один процесс пересчитывает устаревшее значение, остальные отдают
+    прежнее; при пустом кэше они ждут результат того, кто взял блокировку.
+    """
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None:
+        fresh_until, value = entry
+        if fresh_until is None or time.time() < fresh_until:
+            return value
+        if not cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+            return value
+    elif not cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+        deadline = time.time() + settings.CACHE_LOCK_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[1]
+        return store(key, compute, timeout)
+    try:
+        return store(key, compute, timeout)
+    finally:
+        cache.delete(lock_key)
@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def fragment_timeout(request):
+    return {
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT
+    }
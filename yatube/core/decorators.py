@@ -0,0 +1,23 @@
+from functools import wraps
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+
+def cache_headers(max_age):
+    """Гостевые страницы одинаковы для всех и могут кэшироваться
+    прокси, страницы пользователя - только в его браузере.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(
+                    response, private=True, max_age=0, must_revalidate=True
+                )
+            else:
+                patch_cache_control(response, public=True, max_age=max_age)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,197 @@
+import base64
+import binascii
+import collections.abc
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core.caching import get_or_compute
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который не пересчитывает записи на каждый запрос.
+
+    Число записей хранится в кэше по count_key, вместо полного
+    page_range шаблону отдаётся окно номеров страниц с пропусками.
+    """
+
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 count_timeout=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.count_timeout = count_timeout
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return get_or_compute(
+            self.count_key,
+            lambda: super(CachedCountPaginator, self).count,
+            self.count_timeout,
+        )
+
+    def page(self, number):
+        page = super().page(number)
+        page.elided_page_range = list(
+            self.get_elided_page_range(page.number)
+        )
+        return page
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+class CursorPage(collections.abc.Sequence):
+    """Страница ленты, полученная по курсору (pub_date, id)."""
+
+    is_cursor = True
+    number = None
+
+    def __init__(self, object_list, paginator, cursor=None,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class CursorPaginator:
+    """Постраничный вывод без OFFSET и COUNT(*).
+
+    Записи упорядочены от новых к старым по (pub_date, id), каждая
+    страница выбирается поиском по индексу от позиции курсора, поэтому
+    её стоимость не зависит от глубины.
+    """
+
+    def __init__(self, object_list, per_page, fields=('pub_date', 'pk')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field, self.tiebreak = fields
+
+    @staticmethod
+    def value(obj, field):
+        # Страница может состоять и из словарей, полученных через values().
+        if isinstance(obj, dict):
+            return obj[field]
+        return getattr(obj, field)
+
+    def encode_cursor(self, direction, obj):
+        value = self.value(obj, self.field).isoformat()
+        raw = f'{direction}|{value}|{self.value(obj, self.tiebreak)}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            direction, value, pk = raw.split('|')
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise InvalidCursor(cursor)
+        if direction not in (NEXT, PREVIOUS) or value is None:
+            raise InvalidCursor(cursor)
+        return direction, value, pk
+
+    def seek(self, direction, value, pk):
+        # Условие по одному pub_date даёт поиск диапазона по индексу,
+        # пара (pub_date, id) отсекает уже показанные записи с той же датой.
+        if direction == NEXT:
+            return (
+                Q(**{f'{self.field}__lte': value})
+                & (
+                    Q(**{f'{self.field}__lt': value})
+                    | Q(**{f'{self.tiebreak}__lt': pk})
+                )
+            )
+        return (
+            Q(**{f'{self.field}__gte': value})
+            & (
+                Q(**{f'{self.field}__gt': value})
+                | Q(**{f'{self.tiebreak}__gt': pk})
+            )
+        )
+
+    def page(self, cursor=None):
+        if cursor:
+            direction, value, pk = self.decode_cursor(cursor)
+        else:
+            direction = NEXT
+        if direction == NEXT:
+            queryset = self.object_list.order_by(
+                f'-{self.field}', f'-{self.tiebreak}'
+            )
+        else:
+            queryset = self.object_list.order_by(self.field, self.tiebreak)
+        if cursor:
+            queryset = queryset.filter(self.seek(direction, value, pk))
+
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if direction == PREVIOUS:
+            object_list.reverse()
+
+        if direction == NEXT:
+            has_next, has_previous = has_more, bool(cursor)
+        else:
+            has_next, has_previous = True, has_more
+        next_cursor = previous_cursor = None
+        if object_list and has_next:
+            next_cursor = self.encode_cursor(NEXT, object_list[-1])
+        if object_list and has_previous:
+            previous_cursor = self.encode_cursor(PREVIOUS, object_list[0])
+        return CursorPage(
+            object_list, self, cursor, next_cursor, previous_cursor
+        )
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONTENT_NAME = re.compile(
+    r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(?:\.\w+)?$'
+)
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.json', '.map')
+COMPRESSORS = [('.gz', lambda content: gzip.compress(content, 9, mtime=0))]
+if brotli is not None:
+    COMPRESSORS.append(
+        ('.br', lambda content: brotli.compress(content, quality=11))
+    )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 содержимого.
+
+    Файл posts/котик.jpg сохраняется как posts/ab/cd/abcd….jpg: два уровня
+    подкаталогов держат каталоги небольшими при миллионах файлов.
+    Одинаковое содержимое получает одно имя и хранится один раз; число
+    ссылок на файл — это число строк, в которых записано его имя.
+    При повторной загрузке время изменения файла обновляется, чтобы сборщик
+    сирот не удалил его, пока новая строка ещё не записана.
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            os.path.dirname(name),
+            hexdigest[:2],
+            hexdigest[2:4],
+            f'{hexdigest}{extension}',
+        )
+
+    def is_content_name(self, name):
+        return CONTENT_NAME.search(name) is not None
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем содержимого в имени и сжатыми копиями рядом.
+
+    collectstatic пишет css/bootstrap.min.<хэш>.css, манифест
+    staticfiles.json и для текстовых файлов — копии .gz и, если установлен
+    brotli, .br. Такие файлы не меняются, поэтому веб-сервер может отдавать
+    их с Cache-Control: immutable на год и готовыми сжатыми.
+
+    Пока collectstatic не запускался (разработка, тесты), шаблоны получают
+    исходные имена файлов.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        for extension, compress in COMPRESSORS:
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            self._save(name + extension, ContentFile(compressed))
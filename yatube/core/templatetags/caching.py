@@ -0,0 +1,44 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode
+
+from core.caching import get_or_compute
+
+register = template.Library()
+
+
+class SharedCacheNode(CacheNode):
+    def render(self, context):
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except template.VariableDoesNotExist:
+            raise template.TemplateSyntaxError(
+                f'"sharedcache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}'
+            )
+        if expire_time is not None:
+            expire_time = int(expire_time)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+        )
+
+
+@register.tag
+def sharedcache(parser, token):
+    nodelist = parser.parse(('endsharedcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.'
+        )
+    return SharedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+        None,
+    )
@@ -1,17 +1,220 @@
-from django.contrib import admin
+import hashlib
 
-from posts.models import Comment, Follow, Group, Post
+from django.conf import settings
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth.admin import UserAdmin
+from django.forms import BaseModelFormSet
+from django.urls import reverse
+from django.utils.html import format_html
 
+from core.paginators import CachedCountPaginator
+from posts import jobs, search
+from posts.models import BulkJob, Comment, Follow, Group, Post, User
 
-class PostAdmin(admin.ModelAdmin):
+
+class RowAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение, которое берёт подпись выбранного значения из уже
+    загруженного объекта строки, а не отдельным запросом на каждый виджет.
+    """
+
+    selected = None
+
+    def optgroups(self, name, value, attr=None):
+        obj = self.selected
+        if obj is None or [str(v) for v in value] != [str(obj.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, obj.pk, self.choices.field.label_from_instance(obj),
+            True, len(options),
+        ))
+        return [(None, options, 0)]
+
+
+class ChangelistFormSet(BaseModelFormSet):
+    """Формы list_editable, виджеты которых используют связанные объекты
+    из list_select_related.
+    """
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        for name, field in form.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if isinstance(widget, RowAutocompleteSelect):
+                widget.selected = getattr(form.instance, name)
+        return form
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список объектов большой таблицы за ограниченное число запросов.
+
+    Число записей берётся из кэша и может отставать на ADMIN_COUNT_TIMEOUT,
+    а второй COUNT(*) по всей таблице не выполняется вовсе.
+    """
+
+    show_full_result_count = False
+    list_per_page = 50
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault('widget', RowAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            ))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', ChangelistFormSet)
+        return super().get_changelist_formset(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        query = str(queryset.query).encode()
+        return CachedCountPaginator(
+            queryset,
+            per_page,
+            count_key=f'admin-count:{hashlib.md5(query).hexdigest()}',
+            count_timeout=settings.ADMIN_COUNT_TIMEOUT,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
+
+
+class BulkActionsMixin:
+    """Массовые действия выполняются фоновым заданием пачками, а не одной
+    транзакцией в запросе; удаление по умолчанию заменено таким же.
+    """
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def queue_job(self, request, queryset, action, group=None):
+        job = jobs.create(action, queryset, user=request.user, group=group)
+        self.message_user(request, format_html(
+            'Действие <a href="{}">{}</a> поставлено в очередь, '
+            'объектов: {}.',
+            reverse('admin:posts_bulkjob_change', args=(job.pk,)),
+            job,
+            job.total,
+        ))
+
+
+class PostActionForm(ActionForm):
+    # Группы ищутся автодополнением, а не выводятся списком на странице.
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        widget=AutocompleteSelect(
+            Post._meta.get_field('group').remote_field, admin.site
+        ),
+    )
+
+
+class PostAdmin(BulkActionsMixin, LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
 
+    action_form = PostActionForm
+    actions = ('move_to_group', 'delete_in_background')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо LIKE '%…%' по всей таблице — индекс полнотекстового поиска.
+        return search.filter_posts(queryset, search_term), False
+
+    def move_to_group(self, request, queryset):
+        group_id = request.POST.get('group')
+        group = Group.objects.filter(pk=group_id).first() if group_id else None
+        if group_id and group is None:
+            self.message_user(request, 'Группа не найдена.', messages.ERROR)
+            return
+        self.queue_job(request, queryset, BulkJob.MOVE_POSTS, group)
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def delete_in_background(self, request, queryset):
+        self.queue_job(request, queryset, BulkJob.DELETE_POSTS)
+    delete_in_background.short_description = 'Удалить выбранные посты'
+    delete_in_background.allowed_permissions = ('delete',)
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'posts_count')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    date_hierarchy = 'pub_date'
+    empty_value_display = '-пусто-'
+
+
+class FollowAdmin(LargeTableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+
+
+class BulkUserAdmin(BulkActionsMixin, UserAdmin):
+    actions = ('purge_content', 'delete_in_background')
+
+    def purge_content(self, request, queryset):
+        self.queue_job(request, queryset, BulkJob.PURGE_USERS)
+    purge_content.short_description = 'Удалить посты и комментарии'
+    purge_content.allowed_permissions = ('delete',)
+
+    def delete_in_background(self, request, queryset):
+        self.queue_job(request, queryset, BulkJob.DELETE_USERS)
+    delete_in_background.short_description = (
+        'Удалить выбранных пользователей'
+    )
+    delete_in_background.allowed_permissions = ('delete',)
+
+
+class BulkJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'action', 'status', 'progress', 'changed', 'created_by',
+        'created', 'updated',
+    )
+    list_filter = ('status', 'action')
+    list_select_related = ('created_by',)
+    readonly_fields = (
+        'action', 'status', 'group', 'progress', 'changed', 'error',
+        'created_by', 'created', 'updated',
+    )
+    fields = readonly_fields
+
+    def progress(self, job):
+        return f'{job.position} из {job.total}'
+    progress.short_description = 'Обработано'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(BulkJob, BulkJobAdmin)
+admin.site.unregister(User)
+admin.site.register(User, BulkUserAdmin)
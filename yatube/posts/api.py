@@ -0,0 +1,208 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from core.decorators import cache_headers
+from core.paginators import CursorPaginator
+from posts import thumbnails, timeline
+from posts.models import Group, Post, User
+from posts.views import (COMMENTS_ON_PAGE, POSTS_ON_PAGE, comment_feeds,
+                         feed_condition, group_feeds, index_feeds,
+                         post_feeds, profile_feeds)
+
+MAX_LIMIT = 50
+# Имя поля в ответе и выражение для values().
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'comments_count': 'comments_count',
+    'image': 'image',
+}
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+}
+IMAGE_FIELDS = ('image_width', 'image_height')
+THUMBNAIL_FIELDS = ('url', 'width', 'height', 'srcset')
+
+
+class BadRequest(Exception):
+    pass
+
+
+def api_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def handle_bad_request(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return api_response({'error': str(error)}, status=400)
+    return wrapper
+
+
+def login_required(view):
+    """Гостю - JSON-ошибка 401 вместо перенаправления на HTML-страницу
+    входа.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_response({'error': 'Нужна авторизация'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def requested_fields(request, available):
+    """Поля из параметра fields=id,text,...; по умолчанию все."""
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(available)
+    fields = [field for field in fields.split(',') if field]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def requested_limit(request, default):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise BadRequest('limit должен быть числом')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def project(queryset, fields, available, cursor_fields=('pub_date', 'pk')):
+    """Queryset словарей только с нужными столбцами.
+
+    Связанные таблицы присоединяются, только если их поля запрошены;
+    поля курсора выбираются всегда.
+    """
+    lookups = {available[field] for field in fields} | set(cursor_fields)
+    if 'image' in fields:
+        lookups.update(IMAGE_FIELDS)
+    return queryset.values(*lookups)
+
+
+def image_data(row, entries):
+    if not row['image']:
+        return None
+    storage = Post._meta.get_field('image').storage
+    entry = entries.get(row['image'])
+    return {
+        'url': storage.url(row['image']),
+        'width': row['image_width'],
+        'height': row['image_height'],
+        'thumbnail': entry and {
+            field: entry[field] for field in THUMBNAIL_FIELDS
+        },
+    }
+
+
+def serialize(rows, fields, available):
+    entries = (
+        thumbnails.lookup(row['image'] for row in rows)
+        if 'image' in fields else {}
+    )
+    result = []
+    for row in rows:
+        item = {}
+        for field in fields:
+            if field == 'image':
+                item[field] = image_data(row, entries)
+            else:
+                item[field] = row[available[field]]
+        result.append(item)
+    return result
+
+
+def page_data(request, queryset, per_page, available=POST_FIELDS,
+              cursor_fields=('pub_date', 'pk')):
+    fields = requested_fields(request, available)
+    paginator = CursorPaginator(
+        project(queryset, fields, available, cursor_fields),
+        requested_limit(request, per_page),
+        cursor_fields,
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return {
+        'results': serialize(page.object_list, fields, available),
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }
+
+
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(index_feeds)
+@handle_bad_request
+def index(request):
+    return api_response(page_data(request, Post.objects, POSTS_ON_PAGE))
+
+
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(group_feeds)
+@handle_bad_request
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return api_response(
+        page_data(request, group.posts, POSTS_ON_PAGE)
+    )
+
+
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(profile_feeds)
+@handle_bad_request
+def profile(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return api_response(
+        page_data(request, author.posts, POSTS_ON_PAGE)
+    )
+
+
+@login_required
+@handle_bad_request
+def follow_index(request):
+    return api_response(page_data(
+        request,
+        timeline.get_feed(request.user),
+        POSTS_ON_PAGE,
+        cursor_fields=timeline.FEED_ORDERING,
+    ))
+
+
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(post_feeds)
+@handle_bad_request
+def post_detail(request, post_id):
+    fields = requested_fields(request, POST_FIELDS)
+    rows = list(
+        project(Post.objects.filter(pk=post_id), fields, POST_FIELDS)
+    )
+    if not rows:
+        raise Http404('Пост не найден')
+    return api_response(serialize(rows, fields, POST_FIELDS)[0])
+
+
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(comment_feeds)
+@handle_bad_request
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return api_response(page_data(
+        request, post.comments, COMMENTS_ON_PAGE, COMMENT_FIELDS
+    ))
@@ -0,0 +1,204 @@
+import io
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.paginator import Paginator
+from django.template import Context, Template
+from django.template.loader import get_template
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+
+from core import benchmark
+from core.paginators import CachedCountPaginator, CursorPaginator
+from core.templatetags.user_filters import addclass
+from posts import bulk, thumbnails
+from posts.forms import PostForm
+from posts.models import Group, Post, User
+from posts.views import POSTS_ON_PAGE
+
+POSTS_COUNT = 1000
+# Каждый такой по счёту пост - с картинкой.
+IMAGE_EVERY = 5
+# Страница из середины длинной ленты: в пагинаторе есть оба пропуска.
+PAGE_NUMBER = 50
+START_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+DUMMY_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
+THUMBNAIL_TAG = Template(
+    '{% load thumbnail %}'
+    '{% thumbnail image geometry crop="center" upscale=True as im %}'
+    '{{ im.url }}'
+    '{% endthumbnail %}'
+)
+
+CASES = {}
+
+
+def case(**overrides):
+    """Регистрирует замер: функция готовит данные и возвращает вызов,
+    время которого измеряется; overrides подменяют настройки на время
+    замера.
+    """
+    def register(setup):
+        CASES[setup.__name__] = (setup, overrides)
+        return setup
+    return register
+
+
+def create_image():
+    output = io.BytesIO()
+    Image.new('RGB', (1200, 800), (90, 140, 200)).save(output, 'JPEG')
+    storage = Post._meta.get_field('image').storage
+    return storage.save(
+        'posts/benchmark.jpg', ContentFile(output.getvalue())
+    )
+
+
+def create_fixtures():
+    """Автор, группа и POSTS_COUNT постов с фиксированными датами; у
+    каждого IMAGE_EVERY-го поста картинка с готовой миниатюрой.
+    """
+    author = User.objects.create_user(
+        username='benchmark', first_name='Лев', last_name='Толстой'
+    )
+    group = Group.objects.create(
+        title='Замеры', slug='benchmark', description='Постоянные данные'
+    )
+    image = create_image()
+    with bulk.keep_pub_dates():
+        Post.objects.bulk_create([
+            Post(
+                author=author,
+                group=group,
+                text=f'Пост для замеров № {number}. ' * 10,
+                pub_date=START_DATE + timedelta(minutes=number),
+                image=image if number % IMAGE_EVERY == 0 else '',
+            )
+            for number in range(POSTS_COUNT)
+        ])
+    thumbnails.generate(image)
+    return {'author': author, 'group': group, 'image': image}
+
+
+def card_context():
+    post = Post.objects.select_related('author', 'group').exclude(
+        image=''
+    ).first()
+    thumbnails.attach([post])
+    return {
+        'post': post,
+        'show_author': True,
+        'show_group': True,
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
+
+
+@case()
+def card_posts(fixtures):
+    """Карточка поста из кэша фрагментов."""
+    template = get_template('includes/card_posts.html')
+    context = card_context()
+    return lambda: template.render(context)
+
+
+@case(CACHES=DUMMY_CACHE)
+def card_posts_uncached(fixtures):
+    """Карточка поста, отрисованная заново."""
+    template = get_template('includes/card_posts.html')
+    context = card_context()
+    return lambda: template.render(context)
+
+
+@case()
+def paginator_numbered(fixtures):
+    template = get_template('includes/paginator.html')
+    paginator = CachedCountPaginator(range(POSTS_COUNT * 10), POSTS_ON_PAGE)
+    context = {'page_obj': paginator.get_page(PAGE_NUMBER)}
+    return lambda: template.render(context)
+
+
+@case()
+def paginator_cursor(fixtures):
+    template = get_template('includes/paginator.html')
+    paginator = CursorPaginator(Post.objects.all(), POSTS_ON_PAGE)
+    page = paginator.get_page(paginator.get_page().next_cursor)
+    context = {'page_obj': page, 'page_query': ''}
+    return lambda: template.render(context)
+
+
+@case()
+def thumbnail_tag(fixtures):
+    """Тег {% thumbnail %} sorl-thumbnail для готовой миниатюры."""
+    context = Context({
+        'image': fixtures['image'], 'geometry': thumbnails.GEOMETRY
+    })
+    return lambda: THUMBNAIL_TAG.render(context)
+
+
+@case()
+def thumbnails_attach(fixtures):
+    """Миниатюры страницы одним запросом к кэшу вместо тега."""
+    posts = list(Post.objects.exclude(image='')[:POSTS_ON_PAGE])
+    return lambda: thumbnails.attach(posts)
+
+
+@case()
+def addclass_textarea(fixtures):
+    field = PostForm()['text']
+    return lambda: addclass(field, 'form-control')
+
+
+@case()
+def addclass_select(fixtures):
+    """Выбор группы: варианты читаются из базы при каждой отрисовке."""
+    field = PostForm()['group']
+    return lambda: addclass(field, 'form-control')
+
+
+@case()
+def paginator_get_page(fixtures):
+    posts = Post.objects.all()
+    return lambda: list(
+        Paginator(posts, POSTS_ON_PAGE).get_page(PAGE_NUMBER)
+    )
+
+
+@case()
+def cached_count_paginator_get_page(fixtures):
+    posts = Post.objects.all()
+    return lambda: list(CachedCountPaginator(
+        posts, POSTS_ON_PAGE, count_key='benchmark-count'
+    ).get_page(PAGE_NUMBER))
+
+
+@case()
+def cursor_paginator_get_page(fixtures):
+    posts = Post.objects.all()
+    cursor = CursorPaginator(posts, POSTS_ON_PAGE).get_page().next_cursor
+    return lambda: list(
+        CursorPaginator(posts, POSTS_ON_PAGE).get_page(cursor)
+    )
+
+
+def run(names=None, rounds=20, min_time=benchmark.MIN_ROUND_TIME,
+        report=None):
+    """Создаёт данные и замеряет выбранные случаи; report вызывается
+    после каждого замера с его именем и статистикой.
+    """
+    fixtures = create_fixtures()
+    results = {}
+    for name, (setup, overrides) in CASES.items():
+        if names and name not in names:
+            continue
+        with override_settings(**overrides):
+            results[name] = benchmark.measure(
+                setup(fixtures), rounds, min_time=min_time
+            )
+        if report is not None:
+            report(name, results[name])
+    return results
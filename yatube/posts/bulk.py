@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from posts import counters, fragments, search, timeline
+from posts.models import Follow, Group, Post, User
+
+
+@contextmanager
+def keep_pub_dates(models=(Post,)):
+    """bulk_create не заменяет заданную дату публикации текущей."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def refresh(authors, groups, follows):
+    """Один раз делает после bulk_create то, что при обычном сохранении
+    делают сигналы на каждую строку.
+
+    authors и groups - id авторов и групп новых постов, follows - пары
+    (подписчик, автор) новых подписок.
+    """
+    followers = {user_id for user_id, _ in follows}
+    users = set(authors) | followers | {
+        author_id for _, author_id in follows
+    }
+    counters.reconcile_users(User.objects.filter(pk__in=users))
+    counters.reconcile_groups(Group.objects.filter(pk__in=groups))
+    pairs = set(follows) | set(
+        Follow.objects.filter(author__in=authors).values_list(
+            'user', 'author'
+        )
+    )
+    for user_id, author_id in pairs:
+        timeline.follow(user_id, author_id)
+    search.rebuild()
+    fragments.touch(
+        ('index',),
+        *[('group', pk) for pk in groups],
+        *[('profile', pk) for pk in users],
+        *[('follows', pk) for pk in followers],
+    )
+    cache.delete_many(
+        [counters.feed_count_key('index')]
+        + [counters.feed_count_key('group', pk) for pk in groups]
+        + [counters.feed_count_key('profile', pk) for pk in authors]
+        + [counters.feed_count_key('follow', user_id)
+           for user_id, _ in pairs]
+    )
@@ -0,0 +1,138 @@
+from django.core.cache import cache
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from posts.models import Comment, Follow, Group, Post, User, UserCounter
+
+BATCH_SIZE = 500
+
+
+def shift(value, delta):
+    # Счётчик не уходит в минус, даже если успел разойтись с данными.
+    return Greatest(F(value) + delta, 0)
+
+
+def change_post(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=shift('comments_count', delta)
+    )
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=shift('posts_count', delta)
+        )
+
+
+def change_user(user_id, field, delta):
+    UserCounter.objects.filter(user_id=user_id).update(
+        **{field: shift(field, delta)}
+    )
+
+
+def feed_count_key(feed, pk=''):
+    return f'feed-count:{feed}:{pk}'
+
+
+def forget_feed_counts(post, follower_ids=(), group_ids=None):
+    group_ids = [post.group_id] if group_ids is None else group_ids
+    cache.delete_many(
+        [feed_count_key('index'), feed_count_key('profile', post.author_id)]
+        + [feed_count_key('group', pk) for pk in group_ids if pk]
+        + [feed_count_key('follow', user_id) for user_id in follower_ids]
+    )
+
+
+def forget_follow_count(user_id):
+    cache.delete(feed_count_key('follow', user_id))
+
+
+def count_of(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('*')
+            ).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def drifted(queryset, **counters):
+    """Объекты, у которых сохранённые счётчики расходятся с данными."""
+    queryset = queryset.annotate(
+        **{f'actual_{field}': expr for field, expr in counters.items()}
+    )
+    for obj in queryset.iterator():
+        if any(
+            getattr(obj, field) != getattr(obj, f'actual_{field}')
+            for field in counters
+        ):
+            for field in counters:
+                setattr(obj, field, getattr(obj, f'actual_{field}'))
+            yield obj
+
+
+def save_in_batches(model, objects, fields):
+    batch = []
+    fixed = 0
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            model.objects.bulk_update(batch, fields)
+            fixed += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, fields)
+        fixed += len(batch)
+    return fixed
+
+
+def reconcile_posts(queryset=None):
+    queryset = Post.objects.all() if queryset is None else queryset
+    return save_in_batches(
+        Post,
+        drifted(
+            queryset.only('pk', 'comments_count'),
+            comments_count=count_of(Comment.objects, 'post'),
+        ),
+        ['comments_count'],
+    )
+
+
+def reconcile_groups(queryset=None):
+    queryset = Group.objects.all() if queryset is None else queryset
+    return save_in_batches(
+        Group,
+        drifted(
+            queryset.only('pk', 'posts_count'),
+            posts_count=count_of(Post.objects, 'group'),
+        ),
+        ['posts_count'],
+    )
+
+
+def reconcile_users(queryset=None):
+    queryset = User.objects.all() if queryset is None else queryset
+    missing = queryset.filter(counters__isnull=True).values_list(
+        'pk', flat=True
+    )
+    UserCounter.objects.bulk_create(
+        [UserCounter(user_id=user_id) for user_id in missing],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return save_in_batches(
+        UserCounter,
+        drifted(
+            UserCounter.objects.filter(user__in=queryset),
+            posts_count=count_of(Post.objects, 'author'),
+            followers_count=count_of(Follow.objects, 'author'),
+            following_count=count_of(Follow.objects, 'user'),
+        ),
+        ['posts_count', 'followers_count', 'following_count'],
+    )
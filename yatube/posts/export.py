@@ -0,0 +1,140 @@
+import csv
+import json
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from posts.models import Comment, Post
+
+# Строк, читаемых из базы за один раз.
+CHUNK_SIZE = 1000
+# Примерный размер куска ответа и блока чтения картинок.
+BLOCK_SIZE = 64 * 1024
+FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+COLUMNS = ('type', 'id', 'post_id', 'pub_date', 'group', 'image', 'text')
+
+
+def records(user):
+    """Посты и комментарии пользователя по одному, без загрузки всех
+    строк в память.
+    """
+    posts = Post.objects.filter(author=user).order_by('pk').values_list(
+        'pk', 'pub_date', 'group__slug', 'image', 'text'
+    )
+    for pk, pub_date, group, image, text in posts.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': pk,
+            'post_id': None,
+            'pub_date': pub_date,
+            'group': group,
+            'image': image or None,
+            'text': text,
+        }
+    comments = Comment.objects.filter(author=user).order_by(
+        'pk'
+    ).values_list('pk', 'post_id', 'pub_date', 'text')
+    for pk, post_id, pub_date, text in comments.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'comment',
+            'id': pk,
+            'post_id': post_id,
+            'pub_date': pub_date,
+            'group': None,
+            'image': None,
+            'text': text,
+        }
+
+
+class Echo:
+    """Приёмник для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder)
+        yield '\n'
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(Echo(), COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        row['pub_date'] = row['pub_date'].isoformat()
+        yield writer.writerow(row)
+
+
+def join_blocks(lines):
+    """Склеивает мелкие строки в куски около BLOCK_SIZE, чтобы сервер
+    не отправлял каждую строку отдельно.
+    """
+    block, size = [], 0
+    for line in lines:
+        block.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            yield ''.join(block)
+            block, size = [], 0
+    if block:
+        yield ''.join(block)
+
+
+def stream(user, fmt):
+    lines = ndjson_lines if fmt == 'ndjson' else csv_lines
+    return join_blocks(lines(records(user)))
+
+
+class ZipStream:
+    """Файл без перемотки, в который zipfile пишет архив, а генератор
+    забирает записанное по кускам.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        if data:
+            yield data
+
+
+def archive(user, fmt):
+    """Zip-архив с выгрузкой и картинками постов, отдаваемый по мере
+    записи: в памяти не бывает больше одного блока.
+    """
+    output = ZipStream()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        name = f'{user.username}.{fmt}'
+        with zip_file.open(name, 'w', force_zip64=True) as target:
+            for block in stream(user, fmt):
+                target.write(block.encode())
+                yield from output.drain()
+        storage = Post._meta.get_field('image').storage
+        images = Post.objects.filter(author=user).exclude(
+            image=''
+        ).order_by('image').values_list('image', flat=True).distinct()
+        for image in images.iterator(CHUNK_SIZE):
+            if not storage.exists(image):
+                continue
+            # Картинки уже сжаты, поэтому кладутся в архив как есть.
+            info = zipfile.ZipInfo(f'media/{image}')
+            info.compress_type = zipfile.ZIP_STORED
+            with storage.open(image) as source, \
+                    zip_file.open(info, 'w', force_zip64=True) as target:
+                for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+                    target.write(block)
+                    yield from output.drain()
+    yield from output.drain()
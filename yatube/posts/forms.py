@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from posts.images import ingest
 from posts.models import Comment, Post
 
 
@@ -8,8 +10,43 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return ingest(image)
+        return image
+
+    def save(self, commit=True):
+        if 'image' in self.changed_data:
+            # Размеры уже прочитаны при проверке картинки формой.
+            image = self.cleaned_data['image']
+            self.instance.image_width, self.instance.image_height = (
+                image.image.size if image else (None, None)
+            )
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(
+        label='Найти',
+        required=False,
+        max_length=200,
+        widget=forms.TextInput(attrs={'placeholder': 'Что найти'}),
+    )
+    group = forms.SlugField(
+        label='Группа',
+        required=False,
+        widget=forms.TextInput(attrs={'placeholder': 'Группа'}),
+    )
+    author = forms.CharField(
+        label='Автор',
+        required=False,
+        max_length=150,
+        widget=forms.TextInput(attrs={'placeholder': 'Автор'}),
+    )
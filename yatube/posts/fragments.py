@@ -0,0 +1,62 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+
+def version_key(feed, pk=''):
+    return f'feed-version:{feed}:{pk}'
+
+
+def version(feed, pk=''):
+    return cache.get_or_set(version_key(feed, pk), time.time_ns, None)
+
+
+def versions(*feeds):
+    keys = [version_key(*feed) for feed in feeds]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+    return [found.get(key) or missing[key] for key in keys]
+
+
+def context(feed, pk=''):
+    return {
+        'feed_version': version(feed, pk),
+    }
+
+
+def touch(*feeds):
+    """Новая версия ленты делает недоступными все её закэшированные
+    фрагменты, поэтому их срок жизни можно держать большим.
+    """
+    new_version = time.time_ns()
+    cache.set_many(
+        {version_key(*feed): new_version for feed in feeds}, None
+    )
+
+
+def bump(author_id, group_ids=(), post_id=None):
+    feeds = [('index',), ('profile', author_id)]
+    feeds += [('group', pk) for pk in group_ids if pk]
+    if post_id is not None:
+        feeds.append(('post', post_id))
+    touch(*feeds)
+
+
+def bump_posts(posts):
+    """Вызывает bump для строк постов с полями pk, author_id и group_id."""
+    for post in posts:
+        bump(post['author_id'], [post['group_id']], post['pk'])
+
+
+def etag(feeds, user):
+    return '-'.join(map(str, versions(*feeds) + [user.pk or 0]))
+
+
+def last_modified(feeds):
+    # Версия ленты - это время её последнего изменения в наносекундах.
+    return datetime.fromtimestamp(
+        max(versions(*feeds)) / 10 ** 9, tz=timezone.utc
+    )
@@ -0,0 +1,74 @@
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps
+
+FORMATS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85},
+    'GIF': {},
+}
+
+
+def ingest(upload):
+    """Проверяет загруженную картинку и готовит её к сохранению.
+
+    Формат и число пикселей проверяются по заголовку, без декодирования.
+    Затем картинка поворачивается по EXIF, теряет метаданные и, если она
+    больше POST_IMAGE_MAX_SIDE, уменьшается. JPEG декодируется сразу
+    в уменьшенном масштабе, поэтому память ограничена размером результата,
+    а не оригинала. Результат пишется во временный файл на диске.
+    GIF сохраняется как есть, чтобы не потерять анимацию.
+    """
+    if upload.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл картинки слишком большой.', code='file_too_large'
+        )
+    upload.seek(0)
+    source = Image.open(upload)
+    if source.format not in FORMATS:
+        raise ValidationError(
+            'Поддерживаются картинки JPEG, PNG, WebP и GIF.',
+            code='invalid_format',
+        )
+    if source.width * source.height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка слишком большая по числу пикселей.',
+            code='too_many_pixels',
+        )
+    if source.format == 'GIF':
+        upload.seek(0)
+        return upload
+
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    ratio = max_side / max(source.size)
+    result = File(tempfile.TemporaryFile(), name=upload.name)
+    # Повреждённый файл может пройти проверку заголовка и упасть только
+    # при декодировании.
+    try:
+        if ratio < 1:
+            source.draft(
+                'RGB',
+                (round(source.width * ratio), round(source.height * ratio)),
+            )
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_side, max_side))
+        if source.format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options = dict(FORMATS[source.format])
+        if source.info.get('icc_profile'):
+            options['icc_profile'] = source.info['icc_profile']
+        image.save(result, format=source.format, **options)
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        result.close()
+        source.close()
+        raise ValidationError(
+            'Файл картинки повреждён.', code='invalid_image'
+        )
+    result.seek(0)
+    result.image = image
+    source.close()
+    return result
@@ -0,0 +1,208 @@
+import json
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from posts import counters, fragments
+from posts.models import BulkJob, Comment, Follow, Post, TimelineEntry, User
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def delete_step(queryset):
+    """Шаг, удаляющий очередную пачку строк queryset вместе с каскадом.
+
+    Удаление идёт через ORM, поэтому сигналы поддерживают счётчики,
+    индекс поиска и версии фрагментов так же, как при удалении по одному.
+    """
+    def step():
+        ids = list(
+            queryset.order_by('pk').values_list('pk', flat=True)[
+                :settings.BULK_JOB_BATCH_SIZE
+            ]
+        )
+        if not ids:
+            return 0
+        deleted, _ = queryset.model.objects.filter(pk__in=ids).delete()
+        return deleted
+    return step
+
+
+def move_step(ids, group_id):
+    """Шаг, переносящий посты в группу одним UPDATE.
+
+    Сигналы сохранения при этом не срабатывают, поэтому счётчики групп и
+    версии фрагментов обновляются здесь же.
+    """
+    def step():
+        rows = list(
+            Post.objects.filter(pk__in=ids).exclude(
+                group_id=group_id
+            ).values('pk', 'author_id', 'group_id')
+        )
+        if not rows:
+            return 0
+        Post.objects.filter(pk__in=[row['pk'] for row in rows]).update(
+            group_id=group_id, updated=timezone.now()
+        )
+        moved = Counter(row['group_id'] for row in rows)
+        for old_group_id, count in moved.items():
+            counters.change_group(old_group_id, -count)
+        counters.change_group(group_id, len(rows))
+        cache.delete_many([
+            counters.feed_count_key('group', pk)
+            for pk in {*moved, group_id} if pk
+        ])
+        fragments.bump_posts(rows)
+        if group_id is not None:
+            fragments.touch(('group', group_id))
+        return len(rows)
+    return step
+
+
+def purge_steps(ids):
+    # Комментарии к постам удаляются отдельно, чтобы пачка постов не
+    # тянула за собой каскадом неограниченное число строк.
+    return [
+        delete_step(Comment.objects.filter(author_id__in=ids)),
+        delete_step(Comment.objects.filter(post__author_id__in=ids)),
+        delete_step(Post.objects.filter(author_id__in=ids)),
+    ]
+
+
+def steps(job, ids):
+    if job.action == BulkJob.MOVE_POSTS:
+        return [move_step(ids, job.group_id)]
+    if job.action == BulkJob.DELETE_POSTS:
+        return [
+            delete_step(Comment.objects.filter(post_id__in=ids)),
+            delete_step(Post.objects.filter(pk__in=ids)),
+        ]
+    if job.action == BulkJob.PURGE_USERS:
+        return purge_steps(ids)
+    if job.action == BulkJob.DELETE_USERS:
+        return purge_steps(ids) + [
+            delete_step(Follow.objects.filter(
+                Q(user_id__in=ids) | Q(author_id__in=ids)
+            )),
+            delete_step(TimelineEntry.objects.filter(user_id__in=ids)),
+            delete_step(User.objects.filter(pk__in=ids)),
+        ]
+    raise ValueError(f'Неизвестное действие: {job.action}')
+
+
+def create(action, queryset, user=None, group=None):
+    """Запоминает выбранные объекты и ставит действие в очередь."""
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    job = BulkJob.objects.create(
+        action=action,
+        object_ids=json.dumps(ids),
+        total=len(ids),
+        group=group,
+        created_by=user,
+    )
+    transaction.on_commit(lambda: defer(job.pk))
+    return job
+
+
+def claim(job_id):
+    """Помечает действие выполняемым, если его никто не выполняет.
+
+    Выполняемое действие, которое давно не продвигалось, считается
+    прерванным и тоже может быть продолжено.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.BULK_JOB_STALE_TIMEOUT)
+    return BulkJob.objects.filter(pk=job_id).filter(
+        Q(status=BulkJob.PENDING)
+        | Q(status=BulkJob.RUNNING, updated__lt=stale)
+    ).update(status=BulkJob.RUNNING, updated=now) == 1
+
+
+def run(job, max_batches=None):
+    """Выполняет действие пачками, каждую в своей транзакции.
+
+    Между пачками база свободна для других запросов. Шаги повторяемы:
+    каждый заново выбирает ещё не обработанные строки, поэтому после
+    сбоя действие продолжается с сохранённой позиции. После max_batches
+    изменивших строки транзакций выполнение прерывается; возвращает True,
+    если действие завершено.
+    """
+    ids = json.loads(job.object_ids)
+    size = settings.BULK_JOB_BATCH_SIZE
+    jobs = BulkJob.objects.filter(pk=job.pk)
+    batches = 0
+    while job.position < len(ids):
+        chunk = ids[job.position:job.position + size]
+        for step in steps(job, chunk):
+            while True:
+                with transaction.atomic():
+                    changed = step()
+                    if changed:
+                        jobs.update(
+                            changed=F('changed') + changed,
+                            updated=timezone.now(),
+                        )
+                if not changed:
+                    break
+                batches += 1
+                if max_batches is not None and batches >= max_batches:
+                    return False
+        job.position += len(chunk)
+        jobs.update(position=job.position, updated=timezone.now())
+    jobs.update(status=BulkJob.DONE, updated=timezone.now())
+    return True
+
+
+def run_safely(job_id, max_batches=None):
+    """Выполняет действие, если его никто не выполняет; недоделанное
+    после max_batches транзакций возвращается в очередь.
+    """
+    if not claim(job_id):
+        return False
+    job = BulkJob.objects.get(pk=job_id)
+    try:
+        if not run(job, max_batches):
+            BulkJob.objects.filter(pk=job_id).update(
+                status=BulkJob.PENDING, updated=timezone.now()
+            )
+    except Exception as error:
+        logger.exception('Фоновое действие %s не выполнено', job_id)
+        BulkJob.objects.filter(pk=job_id).update(
+            status=BulkJob.FAILED, error=str(error), updated=timezone.now()
+        )
+    return True
+
+
+def start_request():
+    _pending.job_ids = []
+
+
+def finish_request():
+    """Начинает действия, поставленные в очередь во время запроса.
+
+    Вызывается после отправки ответа, когда сервер закрывает его. Пока
+    действие выполняется, процесс сервера не принимает запросы, поэтому
+    здесь выполняется не больше BULK_JOB_REQUEST_BATCHES пачек, а
+    остальное доделывает команда run_bulk_jobs.
+    """
+    job_ids, _pending.job_ids = getattr(_pending, 'job_ids', None) or [], None
+    for job_id in job_ids:
+        run_safely(job_id, settings.BULK_JOB_REQUEST_BATCHES)
+
+
+def defer(job_id):
+    job_ids = getattr(_pending, 'job_ids', None)
+    if job_ids is None:
+        run_safely(job_id)
+    else:
+        job_ids.append(job_id)
@@ -0,0 +1,317 @@
+import http.client
+import json
+import math
+import queue
+import subprocess
+import threading
+import time
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+from posts.urls import app_name, urlpatterns
+
+MODES = ('client', 'wsgi')
+PERCENTILES = (50, 95, 99)
+# Адрес не из INTERNAL_IPS, чтобы замеры не включали debug toolbar.
+REMOTE_ADDR = '192.0.2.1'
+QUERY_TIMEOUT = 30
+
+
+def percentile(values, percent):
+    """Значение ранга percent по возрастанию (nearest-rank)."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(timings, queries, statuses):
+    total = sum(timings)
+    summary = {
+        'requests': len(timings),
+        'status': sorted(set(statuses)),
+        'mean_ms': round(total / len(timings) * 1000, 3),
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(
+            percentile(timings, percent) * 1000, 3
+        )
+    summary['rps'] = round(len(timings) / max(total, 1e-9), 1)
+    summary['queries'] = percentile(queries, 50)
+    summary['max_queries'] = max(queries)
+    return summary
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def default_user():
+    """Самый пишущий автор: у него есть и посты, и подписки."""
+    top = Post.objects.values('author').annotate(
+        posts=Count('pk')
+    ).order_by('-posts').first()
+    return top and User.objects.get(pk=top['author'])
+
+
+def sample_arguments(user):
+    """Значения параметров адресов из данных в базе.
+
+    Профиль берётся у самого пользователя замера, поэтому подписка и
+    отписка на него ничего не меняют в базе, а правка поста доступна.
+    """
+    posts = Post.objects.order_by('-comments_count', '-pk')
+    if user is not None and user.posts.exists():
+        posts = posts.filter(author=user)
+    post = posts.only('pk', 'text').first()
+    group = Group.objects.order_by('-posts_count').only('slug').first()
+    author = user or User.objects.filter(posts__isnull=False).first()
+    arguments = {
+        'post_id': post and post.pk,
+        'slug': group and group.slug,
+        'username': author and author.username,
+    }
+    return {key: value for key, value in arguments.items() if value}, post
+
+
+def routes(arguments, names=None):
+    """Пары (имя, адрес) для каждого маршрута posts/urls.py, которому
+    хватает параметров.
+    """
+    for pattern in urlpatterns:
+        if names and pattern.name not in names:
+            continue
+        converters = pattern.pattern.converters
+        if not set(converters) <= set(arguments):
+            continue
+        yield pattern.name, reverse(
+            f'{app_name}:{pattern.name}',
+            kwargs={key: arguments[key] for key in converters},
+        )
+
+
+class ClientDriver:
+    """Запросы через тестовый клиент Django в том же процессе."""
+
+    def __init__(self, user):
+        self.client = Client(REMOTE_ADDR=REMOTE_ADDR)
+        if user is not None:
+            self.client.force_login(user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, len(queries)
+
+    def close(self):
+        pass
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class WsgiDriver:
+    """Запросы по HTTP к локальному WSGI-серверу в отдельном потоке:
+    в замер входят разбор запроса и передача ответа.
+    """
+
+    def __init__(self, user):
+        self.queries = queue.Queue()
+        self.server = make_server(
+            '127.0.0.1', 0, self.counted(get_wsgi_application()),
+            handler_class=QuietHandler,
+        )
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        self.headers = {}
+        if user is not None:
+            client = Client()
+            client.force_login(user)
+            name = settings.SESSION_COOKIE_NAME
+            self.headers['Cookie'] = f'{name}={client.cookies[name].value}'
+
+    def counted(self, application):
+        """Считает запросы к базе в потоке сервера, включая запросы при
+        отдаче потокового ответа.
+        """
+        def wrapper(environ, start_response):
+            executed = []
+            environ['REMOTE_ADDR'] = REMOTE_ADDR
+
+            def count(execute, sql, params, many, context):
+                executed.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count):
+                response = application(environ, start_response)
+                try:
+                    yield from response
+                finally:
+                    response.close()
+                    self.queries.put(len(executed))
+        return wrapper
+
+    def get(self, url):
+        client = http.client.HTTPConnection(*self.server.server_address)
+        started = time.perf_counter()
+        client.request('GET', url, headers=self.headers)
+        response = client.getresponse()
+        response.read()
+        elapsed = time.perf_counter() - started
+        client.close()
+        return response.status, elapsed, self.queries.get(
+            timeout=QUERY_TIMEOUT
+        )
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает каждый маршрут приложения posts и печатает JSON с '
+        'задержками p50/p95/p99, пропускной способностью и числом '
+        'SQL-запросов, чтобы сравнивать коммиты между собой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Замеряемых запросов на маршрут.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Запросов на маршрут до замера.',
+        )
+        parser.add_argument('--mode', choices=MODES, default='client')
+        parser.add_argument(
+            '--user',
+            help='Пользователь замера; по умолчанию самый пишущий автор.',
+        )
+        parser.add_argument(
+            '--anonymous',
+            action='store_true',
+            help='Запросы без авторизации.',
+        )
+        parser.add_argument(
+            '--route',
+            action='append',
+            dest='routes',
+            help='Имя маршрута; можно повторять.',
+        )
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options)
+        arguments, post = sample_arguments(user)
+        urls = list(routes(arguments, options['routes']))
+        if not urls:
+            raise CommandError(
+                'Нет маршрутов для замера: заполните базу командой '
+                'generate_dataset.'
+            )
+        if settings.DEBUG:
+            self.stderr.write(
+                'DEBUG включён: замеры медленнее, чем в продакшене.'
+            )
+        driver = (WsgiDriver if options['mode'] == 'wsgi' else ClientDriver)(
+            user
+        )
+        try:
+            results = {
+                name: self.measure(driver, name, url, post, options)
+                for name, url in urls
+            }
+        finally:
+            driver.close()
+        report = self.report(options, user, results)
+        self.write(report, options['output'])
+
+    def get_user(self, options):
+        if options['anonymous']:
+            return None
+        if not options['user']:
+            return default_user()
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f'Нет пользователя {options["user"]}.')
+        return user
+
+    def measure(self, driver, name, url, post, options):
+        if name == 'search' and post is not None:
+            url = f'{url}?q={post.text.split()[0].strip(".,")}'
+        for _ in range(options['warmup']):
+            driver.get(url)
+        timings, queries, statuses = [], [], []
+        for _ in range(max(options['requests'], 1)):
+            status, elapsed, count = driver.get(url)
+            statuses.append(status)
+            timings.append(elapsed)
+            queries.append(count)
+        summary = {'url': url, **summarize(timings, queries, statuses)}
+        self.stderr.write(
+            f'{name}: p50 {summary["p50_ms"]} мс, '
+            f'{summary["queries"]} запросов'
+        )
+        return summary
+
+    def report(self, options, user, results):
+        timings = [
+            result['mean_ms'] * result['requests']
+            for result in results.values()
+        ]
+        requests = sum(result['requests'] for result in results.values())
+        return {
+            'commit': commit(),
+            'date': timezone.now().isoformat(),
+            'mode': options['mode'],
+            'debug': settings.DEBUG,
+            'database': connection.vendor,
+            'user': user and user.username,
+            'posts': Post.objects.count(),
+            'routes': results,
+            'total': {
+                'requests': requests,
+                'rps': round(requests / max(sum(timings) / 1000, 1e-9), 1),
+            },
+        }
+
+    def write(self, report, path):
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if path:
+            with open(path, 'w', encoding='utf-8') as output:
+                output.write(content + '\n')
+        else:
+            self.stdout.write(content)
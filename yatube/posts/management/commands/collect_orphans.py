@@ -0,0 +1,141 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.models import KVStore
+
+from posts import thumbnails
+from posts.models import Post
+
+BATCH_SIZE = 500
+
+
+def walk(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+def batches(names, size):
+    batch = []
+    for name in names:
+        batch.append(name)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки, на которые не ссылается ни один пост, '
+        'их миниатюры и записи sorl-thumbnail о них. Затем пачками '
+        'перебирает списки миниатюр sorl и удаляет миниатюры картинок, '
+        'которых уже нет в хранилище.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=24 * 60 * 60,
+            help='Не трогать файлы, изменённые позже, чем столько секунд '
+                 'назад: их пост может быть ещё не сохранён.',
+        )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        upload_to = Post._meta.get_field('image').upload_to
+        cutoff = timezone.now() - timedelta(seconds=options['grace'])
+        checked = removed = freed = 0
+        if storage.exists(upload_to):
+            for batch in batches(walk(storage, upload_to), BATCH_SIZE):
+                # Ссылки проверяются непосредственно перед удалением пачки.
+                referenced = set(
+                    Post.objects.filter(image__in=batch).values_list(
+                        'image', flat=True
+                    )
+                )
+                for name in batch:
+                    if (name in referenced
+                            or storage.get_modified_time(name) > cutoff):
+                        continue
+                    freed += storage.size(name) + thumbnails.forget(name)
+                    storage.delete(name)
+                    removed += 1
+                checked += len(batch)
+                self.stdout.write(
+                    f'проверено файлов: {checked}, удалено: {removed}'
+                )
+        forgotten, thumbnails_freed = self.collect_thumbnails()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено картинок: {removed}, освобождено байт: {freed}. '
+            f'Удалены миниатюры пропавших картинок: {forgotten}, '
+            f'освобождено байт: {thumbnails_freed}.'
+        ))
+
+    def collect_thumbnails(self):
+        """Миниатюры, записи sorl и кэша картинок, пропавших помимо
+        этой команды, например старых файлов после shard_media.
+
+        Списки миниатюр читаются из таблицы sorl по ключу, пачками
+        по BATCH_SIZE, поэтому память не зависит от размера хранилища.
+        """
+        prefix = add_prefix('', 'thumbnails')
+        keys = KVStore.objects.filter(key__startswith=prefix).order_by(
+            'key'
+        ).values_list('key', flat=True)
+        last_key = prefix
+        checked = forgotten = freed = 0
+        while True:
+            batch = list(keys.filter(key__gt=last_key)[:BATCH_SIZE])
+            if not batch:
+                break
+            last_key = batch[-1]
+            sources = {}
+            for key in map(del_prefix, batch):
+                source = default.kvstore._get(key)
+                if source is not None:
+                    sources[source.name] = source
+                    continue
+                # Список миниатюр без записи о самой картинке.
+                freed += self.delete_thumbnails(key)
+                forgotten += 1
+            referenced = set(
+                Post.objects.filter(image__in=sources).values_list(
+                    'image', flat=True
+                )
+            )
+            for name, source in sources.items():
+                if name in referenced or source.exists():
+                    continue
+                freed += thumbnails.forget(name)
+                forgotten += 1
+            checked += len(batch)
+            self.stdout.write(
+                f'проверено списков миниатюр: {checked}, '
+                f'удалено: {forgotten}'
+            )
+        return forgotten, freed
+
+    @staticmethod
+    def delete_thumbnails(key):
+        """То же, что KVStore.delete_thumbnails, но по ключу источника."""
+        freed = 0
+        kvstore = default.kvstore
+        for thumbnail_key in kvstore._get(key, identity='thumbnails') or []:
+            thumbnail = kvstore._get(thumbnail_key)
+            if thumbnail is None:
+                continue
+            if thumbnail.exists():
+                freed += thumbnail.storage.size(thumbnail.name)
+                thumbnail.delete()
+            kvstore.delete(thumbnail, delete_thumbnails=False)
+        kvstore._delete(key, identity='thumbnails')
+        return freed
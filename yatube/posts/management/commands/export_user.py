@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты и комментарии пользователя в CSV или NDJSON, '
+        'при --media - в zip-архив вместе с картинками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format',
+            choices=tuple(export.FORMATS),
+            default='ndjson',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--media',
+            action='store_true',
+            help='Собрать zip-архив с картинками постов.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        fmt = options['format']
+        if options['media'] and not options['output']:
+            raise CommandError('Архив выгружается только в файл: --output.')
+        if not options['output']:
+            for block in export.stream(user, fmt):
+                self.stdout.write(block, ending='')
+            return
+        if options['media']:
+            chunks = export.archive(user, fmt)
+        else:
+            chunks = (block.encode() for block in export.stream(user, fmt))
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
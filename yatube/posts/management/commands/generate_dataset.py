@@ -0,0 +1,255 @@
+import io
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageOps
+
+from posts import bulk, counters
+from posts.models import Comment, Follow, Group, Post, User
+
+IMAGE_SIZES = ((640, 480), (1200, 800), (800, 1200), (1920, 1080))
+
+
+def zipf_weights(count, skew):
+    """Веса рангов по закону Ципфа: немногие авторы пишут большую часть
+    постов и собирают большую часть подписчиков, как на живом сайте.
+    """
+    return [1 / rank ** skew for rank in range(1, count + 1)]
+
+
+def chunks(objects, size):
+    for start in range(0, len(objects), size):
+        yield objects[start:start + size]
+
+
+def make_image(rng):
+    """Градиент случайных цветов: у каждой картинки своё содержимое,
+    а значит и своё имя в хранилище.
+    """
+    width, height = rng.choice(IMAGE_SIZES)
+    colors = [
+        tuple(rng.randrange(256) for _ in range(3)) for _ in range(2)
+    ]
+    image = ImageOps.colorize(
+        Image.linear_gradient('L').resize((width, height)), *colors
+    )
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=85)
+    return output.getvalue(), width, height
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями, подписками и картинками для нагрузочных замеров. '
+        'Посты и подписчики распределены между авторами по закону Ципфа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=20,
+            help='Среднее число подписок одного пользователя.',
+        )
+        parser.add_argument(
+            '--image-ratio',
+            type=float,
+            default=0.2,
+            help='Доля постов с картинкой.',
+        )
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=30,
+            help='Сколько разных картинок создать.',
+        )
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель закона Ципфа; 0 - равномерно.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней разбросать даты публикации.',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='gen',
+            help='Префикс имён пользователей и адресов групп.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        self.options = options
+        self.batch_size = max(options['batch_size'], 1)
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.now = timezone.now()
+        started = time.monotonic()
+        users = self.create_users()
+        groups = self.create_groups()
+        follows = self.create_follows(users)
+        with bulk.keep_pub_dates((Post, Comment)):
+            posts = self.create_posts(users, groups)
+            self.create_comments(users, posts)
+        counters.reconcile_posts(Post.objects.filter(pk__in=posts))
+        bulk.refresh(
+            {author_id for author_id, _ in posts.values()},
+            set(groups),
+            follows,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, групп: {len(groups)}, '
+            f'постов: {len(posts)}, подписок: {len(follows)}, '
+            f'{time.monotonic() - started:.1f} с.'
+        ))
+
+    def bulk_create(self, model, objects, **kwargs):
+        for batch in chunks(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+
+    def create_users(self):
+        """id пользователей в порядке убывания популярности."""
+        prefix = self.options['prefix']
+        password = make_password(None)
+        names = [
+            f'{prefix}{number}_{self.fake.user_name()}'[:150]
+            for number in range(self.options['users'])
+        ]
+        self.bulk_create(User, [
+            User(
+                username=name,
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+            )
+            for name in names
+        ], ignore_conflicts=True)
+        ids = dict(
+            User.objects.filter(username__in=names).values_list(
+                'username', 'pk'
+            )
+        )
+        return [ids[name] for name in names]
+
+    def create_groups(self):
+        prefix = self.options['prefix']
+        slugs = [
+            f'{prefix}-{number}-{self.fake.slug()}'[:50]
+            for number in range(self.options['groups'])
+        ]
+        self.bulk_create(Group, [
+            Group(
+                slug=slug,
+                title=self.fake.catch_phrase()[:200],
+                description=self.fake.paragraph(),
+            )
+            for slug in slugs
+        ], ignore_conflicts=True)
+        return list(
+            Group.objects.filter(slug__in=slugs).values_list('pk', flat=True)
+        )
+
+    def create_follows(self, users):
+        """Каждый подписывается в среднем на --follows авторов, чаще на
+        популярных.
+        """
+        weights = zipf_weights(len(users), self.options['skew'])
+        pairs = set()
+        for user_id in users:
+            wanted = self.rng.randint(0, 2 * self.options['follows'])
+            authors = self.rng.choices(users, weights, k=wanted)
+            pairs.update(
+                (user_id, author_id) for author_id in authors
+                if author_id != user_id
+            )
+        self.bulk_create(Follow, [
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in sorted(pairs)
+        ], ignore_conflicts=True)
+        return pairs
+
+    def create_images(self):
+        storage = Post._meta.get_field('image').storage
+        images = []
+        for _ in range(self.options['images']):
+            content, width, height = make_image(self.rng)
+            name = storage.save(
+                'posts/generated.jpg', ContentFile(content)
+            )
+            images.append((name, width, height))
+        return images
+
+    def random_date(self, since):
+        return since + timedelta(
+            seconds=self.rng.uniform(0, (self.now - since).total_seconds())
+        )
+
+    def create_posts(self, users, groups):
+        """Словарь id поста -> (id автора, дата публикации)."""
+        weights = zipf_weights(len(users), self.options['skew'])
+        images = self.create_images() if self.options['image_ratio'] else []
+        start = self.now - timedelta(days=self.options['days'])
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        posts = []
+        for author_id in self.rng.choices(
+            users, weights, k=self.options['posts']
+        ):
+            post = Post(
+                author_id=author_id,
+                group_id=self.rng.choice(groups + [None]),
+                text=self.fake.paragraph(
+                    nb_sentences=self.rng.randint(1, 12)
+                ),
+                pub_date=self.random_date(start),
+            )
+            if images and self.rng.random() < self.options['image_ratio']:
+                (post.image, post.image_width,
+                 post.image_height) = self.rng.choice(images)
+            posts.append(post)
+        self.bulk_create(Post, posts)
+        return {
+            pk: (author_id, pub_date)
+            for pk, author_id, pub_date in Post.objects.filter(
+                pk__gt=last_pk
+            ).values_list('pk', 'author_id', 'pub_date')
+        }
+
+    def create_comments(self, users, posts):
+        """Комментарии к случайным постам: у популярных авторов больше
+        постов, а значит и комментариев.
+        """
+        if not posts:
+            return
+        post_ids = list(posts)
+        comments = []
+        for _ in range(self.options['comments']):
+            post_id = self.rng.choice(post_ids)
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=self.rng.choice(users),
+                text=self.fake.sentence(),
+                pub_date=self.random_date(posts[post_id][1]),
+            ))
+        self.bulk_create(Comment, comments)
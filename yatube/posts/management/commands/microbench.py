@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+
+from core import benchmark
+from posts import benchmarks
+from posts.management.commands.benchmark import commit
+
+LOCAL_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет отрисовку карточки поста, пагинатора, миниатюр, фильтра '
+        'addclass и выбор страницы пагинаторами на постоянных данных во '
+        'временной базе, сохраняет базовую линию и сообщает о регрессиях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names',
+            nargs='*',
+            metavar='name',
+            help=f'Замеры: {", ".join(benchmarks.CASES)}; по умолчанию все.',
+        )
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument(
+            '--min-time',
+            type=float,
+            default=benchmark.MIN_ROUND_TIME,
+            help='Минимальная длительность раунда в секундах.',
+        )
+        parser.add_argument(
+            '--baseline',
+            default=settings.BENCHMARK_BASELINE,
+            help='Файл базовой линии.',
+        )
+        parser.add_argument(
+            '--save',
+            action='store_true',
+            help='Сохранить результаты как базовую линию.',
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Сравнить с базовой линией и упасть при регрессии.',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=settings.BENCHMARK_THRESHOLD,
+            help='Допустимое замедление лучшего раунда, доля.',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(benchmarks.CASES)
+        if unknown:
+            raise CommandError(f'Нет замеров: {", ".join(sorted(unknown))}')
+        baseline = {}
+        if options['compare']:
+            try:
+                baseline = benchmark.load_baseline(options['baseline'])
+            except FileNotFoundError:
+                raise CommandError(
+                    f'Нет базовой линии {options["baseline"]}: '
+                    f'сначала запустите с --save.'
+                )
+        self.baseline = baseline
+        self.threshold = options['threshold']
+        results = self.run(options)
+        if options['save']:
+            benchmark.save_baseline(
+                options['baseline'], results, commit=commit()
+            )
+            self.stdout.write(f'Базовая линия: {options["baseline"]}')
+        regressions = [
+            name for name, (_, regressed) in benchmark.compare(
+                results, baseline, self.threshold
+            ).items() if regressed
+        ]
+        if regressions:
+            raise CommandError(f'Регрессии: {", ".join(regressions)}')
+
+    def run(self, options):
+        """Замеры во временной базе, с временными медиа и кэшем в
+        памяти, чтобы не трогать рабочие данные.
+        """
+        media_root = tempfile.mkdtemp()
+        databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                CACHES=LOCAL_CACHE,
+                THUMBNAIL_BACKGROUND=False,
+            ):
+                return benchmarks.run(
+                    options['names'],
+                    max(options['rounds'], 1),
+                    options['min_time'],
+                    self.report,
+                )
+        finally:
+            teardown_databases(databases, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def report(self, name, stats):
+        line = (
+            f'{name:<34} {stats["min"] * 1e6:>9.1f} мкс, медиана '
+            f'{stats["median"] * 1e6:.1f} ± {stats["stddev"] * 1e6:.1f}, '
+            f'{stats["ops"]:.0f} оп/с'
+        )
+        change = benchmark.compare(
+            {name: stats}, self.baseline, self.threshold
+        ).get(name)
+        if change is None:
+            self.stdout.write(line)
+            return
+        line = f'{line}, {change[0]:+.1%} к базовой линии'
+        if change[1]:
+            self.stdout.write(self.style.ERROR(f'{line} - РЕГРЕССИЯ'))
+        else:
+            self.stdout.write(self.style.SUCCESS(line))
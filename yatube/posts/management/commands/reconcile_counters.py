@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок.'
+
+    def handle(self, *args, **options):
+        reconciled = {
+            'посты': counters.reconcile_posts(),
+            'группы': counters.reconcile_groups(),
+            'пользователи': counters.reconcile_users(),
+        }
+        for name, fixed in reconciled.items():
+            self.stdout.write(f'{name}: исправлено {fixed}')
+        self.stdout.write(self.style.SUCCESS('Счётчики сверены.'))
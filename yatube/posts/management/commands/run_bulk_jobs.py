@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from posts import jobs
+from posts.models import BulkJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые действия админки, которые ждут в очереди или '
+        'были прерваны, например перезапуском сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry',
+            action='store_true',
+            help='Повторить и действия, завершившиеся ошибкой.',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry']:
+            BulkJob.objects.filter(status=BulkJob.FAILED).update(
+                status=BulkJob.PENDING, error=''
+            )
+        job_ids = BulkJob.objects.exclude(
+            status__in=(BulkJob.DONE, BulkJob.FAILED)
+        ).order_by('pk').values_list('pk', flat=True)
+        for job_id in job_ids:
+            if not jobs.run_safely(job_id):
+                self.stdout.write(f'#{job_id}: выполняется в другом процессе')
+                continue
+            job = BulkJob.objects.get(pk=job_id)
+            self.stdout.write(
+                f'#{job_id}: {job.get_status_display()}, обработано '
+                f'{job.position} из {job.total}, изменено строк: '
+                f'{job.changed}'
+            )
+        self.stdout.write(self.style.SUCCESS('Готово.'))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from posts import fragments, thumbnails
+from posts.models import Post
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в хранилище с именами по содержимому. '
+        'Повторный запуск продолжает с необработанных постов.'
+    )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        moved = missing = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.exclude(image='').filter(
+                    pk__gt=last_pk
+                ).order_by('pk').values_list('pk', 'image')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            for pk, name in batch:
+                if storage.is_content_name(name):
+                    continue
+                if not storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f'нет файла: {name}')
+                    continue
+                with storage.open(name) as content:
+                    new_name = storage.save(name, content)
+                # Все посты с этим файлом переходят на новое имя разом,
+                # после чего на старый файл никто не ссылается.
+                posts = Post.objects.filter(image=name)
+                rows = list(posts.values('pk', 'author_id', 'group_id'))
+                posts.update(image=new_name)
+                fragments.bump_posts(rows)
+                # Миниатюры старого файла больше никому не нужны.
+                thumbnails.forget(name)
+                storage.delete(name)
+                moved += 1
+            self.stdout.write(f'обработаны посты до id {last_pk}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {moved}, не найдено: {missing}.'
+        ))
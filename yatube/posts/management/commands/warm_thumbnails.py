@@ -0,0 +1,85 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from posts import thumbnails
+from posts.models import Post
+
+CHECKPOINT_KEY = 'thumbnails:warm:last_pk'
+BATCH_SIZE = 100
+
+
+def warm(name):
+    try:
+        return thumbnails.generate(name)
+    except Exception:
+        return False
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры картинок существующих постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов; при 1 миниатюры создаются в этом же.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить с поста, на котором остановился прошлый запуск.',
+        )
+
+    def handle(self, *args, **options):
+        last_pk = cache.get(CHECKPOINT_KEY, 0) if options['resume'] else 0
+        posts = Post.objects.exclude(image='').filter(
+            pk__gt=last_pk
+        ).order_by('pk')
+        total = posts.count()
+        done = failed = 0
+        workers = max(options['workers'], 1)
+        pool = None
+        if workers > 1:
+            # Дочерние процессы не должны делить соединение с родителем.
+            # При запуске через spawn (macOS, Windows) они начинают с
+            # чистого интерпретатора, поэтому Django настраивается заново.
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=django.setup
+            )
+        try:
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last_pk).values_list('pk', 'image')[
+                        :BATCH_SIZE
+                    ]
+                )
+                if not batch:
+                    break
+                names = [image for pk, image in batch]
+                results = (
+                    pool.map(warm, names) if pool else map(warm, names)
+                )
+                for (pk, image), created in zip(batch, results):
+                    if not created:
+                        failed += 1
+                        self.stderr.write(f'не удалось: {image}')
+                    done += 1
+                    last_pk = pk
+                cache.set(CHECKPOINT_KEY, last_pk, None)
+                self.stdout.write(f'обработано {done} из {total}')
+        finally:
+            if pool:
+                pool.shutdown()
+        cache.delete(CHECKPOINT_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы: {done - failed}, ошибок: {failed}.'
+        ))
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.19 on 2026-10-17 04:34
+
+from django.core.files.images import get_image_dimensions
+from django.db import migrations, models
+
+
+def fill_image_sizes(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    for post in Post.objects.exclude(image='').only('image').iterator():
+        try:
+            width, height = get_image_dimensions(post.image)
+        except OSError:
+            continue
+        Post.objects.filter(pk=post.pk).update(
+            image_width=width, image_height=height
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(fill_image_sizes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+            "text, tokenize='unicode61 remove_diacritics 2')",
+            'DROP TABLE posts_post_fts',
+        ),
+        migrations.RunSQL(
+            'INSERT INTO posts_post_fts (rowid, text) '
+            'SELECT id, text FROM posts_post',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.19 on 2026-10-17 04:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('move_posts', 'Перенос постов в группу'), ('delete_posts', 'Удаление постов'), ('purge_users', 'Удаление постов и комментариев пользователей'), ('delete_users', 'Удаление пользователей')], max_length=20, verbose_name='Действие')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], db_index=True, default='pending', max_length=10, verbose_name='Состояние')),
+                ('object_ids', models.TextField(editable=False, verbose_name='Объекты')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Всего объектов')),
+                ('position', models.PositiveIntegerField(default=0, verbose_name='Обработано объектов')),
+                ('changed', models.PositiveIntegerField(default=0, verbose_name='Изменено строк')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Фоновое действие',
+                'verbose_name_plural': 'Фоновые действия',
+                'ordering': ['-pk'],
+            },
+        ),
+    ]
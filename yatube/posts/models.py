@@ -1,4 +1,5 @@
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -11,6 +12,11 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Постов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -36,11 +42,43 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         default_related_name = 'posts'
+        indexes = [
+            models.Index(
+                fields=('group', 'pub_date'),
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+        ]
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
@@ -61,6 +99,12 @@ class Comment(CreatedModel):
 
     class Meta:
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=('post', 'pub_date'),
+                name='comment_post_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -86,6 +130,128 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('author')),
                 name='users_cannot_follow_themselves'
             ),
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
         ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+
+
+class UserCounter(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+
+class BulkJob(models.Model):
+    MOVE_POSTS = 'move_posts'
+    DELETE_POSTS = 'delete_posts'
+    PURGE_USERS = 'purge_users'
+    DELETE_USERS = 'delete_users'
+    ACTIONS = (
+        (MOVE_POSTS, 'Перенос постов в группу'),
+        (DELETE_POSTS, 'Удаление постов'),
+        (PURGE_USERS, 'Удаление постов и комментариев пользователей'),
+        (DELETE_USERS, 'Удаление пользователей'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField('Действие', max_length=20, choices=ACTIONS)
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        db_index=True
+    )
+    object_ids = models.TextField('Объекты', editable=False)
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Группа'
+    )
+    total = models.PositiveIntegerField('Всего объектов', default=0)
+    position = models.PositiveIntegerField('Обработано объектов', default=0)
+    changed = models.PositiveIntegerField('Изменено строк', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        ordering = ['-pk']
+        verbose_name = 'Фоновое действие'
+        verbose_name_plural = 'Фоновые действия'
+
+    def __str__(self):
+        return f'{self.get_action_display()} #{self.pk}'
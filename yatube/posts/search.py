@@ -0,0 +1,176 @@
+import base64
+import binascii
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from core.paginators import NEXT, PREVIOUS, CursorPage, InvalidCursor
+from posts.models import Post
+
+TABLE = 'posts_post_fts'
+MAX_TERMS = 10
+# Границы подсветки; в тексте поста их не бывает, а после экранирования
+# они заменяются на теги.
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+
+
+def index(post):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def unindex(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild():
+    """Заново строит индекс по всем постам, например после массовых
+    операций в обход сигналов.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+
+def to_match(query):
+    """Запрос пользователя в выражение MATCH: все слова обязательны,
+    последнее может быть началом слова.
+    """
+    terms = re.findall(r'\w+', query.lower())[:MAX_TERMS]
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def filter_posts(queryset, query):
+    """Оставляет в queryset посты, подходящие под запрос, по индексу FTS."""
+    match = to_match(query)
+    if not match:
+        return queryset
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [match]
+    ))
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet).replace(
+            HIGHLIGHT_START, '<mark>'
+        ).replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+class SearchPaginator:
+    """Постраничный вывод результатов поиска по курсору (rank, id).
+
+    Порядок задаёт bm25 из FTS5: чем меньше rank, тем выше пост. Страница
+    выбирается из индекса FTS с условием на позицию курсора, без OFFSET.
+    """
+
+    def __init__(self, query, per_page, group_id=None, author_id=None):
+        self.match = to_match(query)
+        self.per_page = int(per_page)
+        self.filters = []
+        self.params = []
+        if group_id is not None:
+            self.filters.append('post.group_id = %s')
+            self.params.append(group_id)
+        if author_id is not None:
+            self.filters.append('post.author_id = %s')
+            self.params.append(author_id)
+
+    def encode_cursor(self, direction, post):
+        raw = f'{direction}|{post.rank!r}|{post.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            direction, rank, pk = raw.split('|')
+            rank, pk = float(rank), int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise InvalidCursor(cursor)
+        if direction not in (NEXT, PREVIOUS):
+            raise InvalidCursor(cursor)
+        return direction, rank, pk
+
+    def fetch(self, direction, rank=None, pk=None):
+        where = [f'{TABLE} MATCH %s', *self.filters]
+        params = [self.match, *self.params]
+        if rank is not None:
+            sign = '>' if direction == NEXT else '<'
+            where.append(
+                f'({TABLE}.rank {sign} %s '
+                f'OR ({TABLE}.rank = %s AND {TABLE}.rowid {sign} %s))'
+            )
+            params += [rank, rank, pk]
+        order = 'ASC' if direction == NEXT else 'DESC'
+        sql = (
+            f'SELECT {TABLE}.rowid, {TABLE}.rank, '
+            f"snippet({TABLE}, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', "
+            f"'…', {SNIPPET_TOKENS}) "
+            f'FROM {TABLE} JOIN posts_post post ON post.id = {TABLE}.rowid '
+            f'WHERE {" AND ".join(where)} '
+            f'ORDER BY {TABLE}.rank {order}, {TABLE}.rowid {order} '
+            f'LIMIT %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*params, self.per_page + 1])
+            return cursor.fetchall()
+
+    def page(self, cursor=None):
+        if cursor:
+            direction, rank, pk = self.decode_cursor(cursor)
+        else:
+            direction, rank, pk = NEXT, None, None
+        rows = self.fetch(direction, rank, pk) if self.match else []
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [row[0] for row in rows]
+        )
+        object_list = []
+        for post_id, post_rank, snippet in rows:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            post.rank = post_rank
+            post.snippet = highlight(snippet)
+            object_list.append(post)
+
+        if direction == NEXT:
+            has_next, has_previous = has_more, bool(cursor)
+        else:
+            has_next, has_previous = True, has_more
+        next_cursor = previous_cursor = None
+        if object_list and has_next:
+            next_cursor = self.encode_cursor(NEXT, object_list[-1])
+        if object_list and has_previous:
+            previous_cursor = self.encode_cursor(PREVIOUS, object_list[0])
+        return CursorPage(
+            object_list, self, cursor, next_cursor, previous_cursor
+        )
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from posts import counters, fragments, jobs, search, thumbnails, timeline
+from posts.models import Comment, Follow, Group, Post, UserCounter
+
+
+def bump_post_fragments(post_id):
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'group_id'
+    ).first()
+    if post is not None:
+        fragments.bump(post['author_id'], [post['group_id']], post_id)
+
+
+def touch_follow_fragments(follow):
+    fragments.touch(
+        ('profile', follow.author_id),
+        ('profile', follow.user_id),
+        ('follows', follow.user_id),
+    )
+
+
+@receiver(request_started)
+def start_thumbnails(sender, **kwargs):
+    thumbnails.start_request()
+
+
+@receiver(request_finished)
+def finish_thumbnails(sender, **kwargs):
+    thumbnails.finish_request()
+
+
+@receiver(request_started)
+def start_jobs(sender, **kwargs):
+    jobs.start_request()
+
+
+@receiver(request_finished)
+def finish_jobs(sender, **kwargs):
+    jobs.finish_request()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_user_counter(sender, instance, created, **kwargs):
+    if created:
+        UserCounter.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Group)
+def touch_group_fragments(sender, instance, **kwargs):
+    fragments.touch(('index',), ('group', instance.pk))
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._saved_group_id = (
+        Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', flat=True
+        ).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.author_id, 'posts_count', 1)
+        counters.change_group(instance.group_id, 1)
+        counters.forget_feed_counts(instance, timeline.fan_out(instance))
+    elif instance._saved_group_id != instance.group_id:
+        counters.change_group(instance._saved_group_id, -1)
+        counters.change_group(instance.group_id, 1)
+        counters.forget_feed_counts(
+            instance, group_ids=[instance._saved_group_id, instance.group_id]
+        )
+    fragments.bump(
+        instance.author_id,
+        [instance._saved_group_id, instance.group_id],
+        instance.pk,
+    )
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnail(sender, instance, **kwargs):
+    thumbnails.schedule(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'posts_count', -1)
+    counters.change_group(instance.group_id, -1)
+    counters.forget_feed_counts(instance)
+    fragments.bump(instance.author_id, [instance.group_id], instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post(instance.post_id, 1)
+    bump_post_fragments(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+    bump_post_fragments(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user(instance.user_id, 'following_count', 1)
+        counters.change_user(instance.author_id, 'followers_count', 1)
+        timeline.follow(instance.user_id, instance.author_id)
+        counters.forget_follow_count(instance.user_id)
+        touch_follow_fragments(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_user(instance.user_id, 'following_count', -1)
+    counters.change_user(instance.author_id, 'followers_count', -1)
+    timeline.unfollow(instance.user_id, instance.author_id)
+    counters.forget_follow_count(instance.user_id)
+    touch_follow_fragments(instance)
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def add_rows(self, count):
+        authors = User.objects.bulk_create(
+            User(username=f'author{Post.objects.count() + i}')
+            for i in range(count)
+        )
+        for author in User.objects.filter(
+            username__in=[author.username for author in authors]
+        ):
+            post = Post.objects.create(
+                author=author, text='Тестовый пост', group=self.group
+            )
+            Comment.objects.create(
+                author=author, post=post, text='Тестовый комментарий'
+            )
+            Follow.objects.create(user=author, author=self.admin)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк на странице."""
+        for model in ('post', 'comment', 'follow'):
+            url = reverse(f'admin:posts_{model}_changelist')
+            self.add_rows(3)
+            few = self.count_queries(url)
+            self.add_rows(10)
+            with self.subTest(model=model):
+                self.assertEqual(self.count_queries(url), few)
+
+    def test_changelist_count_is_cached(self):
+        """Повторное открытие списка не считает строки заново."""
+        self.add_rows(3)
+        url = reverse('admin:posts_post_changelist')
+        self.admin_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.admin_client.get(url)
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+
+    def test_post_search_uses_full_text_index(self):
+        """Поиск в админке идёт по индексу полнотекстового поиска."""
+        Post.objects.create(author=self.admin, text='Рыжий котёнок')
+        Post.objects.create(author=self.admin, text='Собака')
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(url, {'q': 'котёнок'})
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['Рыжий котёнок'],
+        )
+        self.assertFalse(any('LIKE' in query['sql'] for query in queries))
+
+    def test_editable_group_uses_autocomplete(self):
+        """Группа в списке постов выбирается автодополнением, а не
+        выпадающим списком всех групп.
+        """
+        Group.objects.create(title='Чужая группа', slug='other')
+        for _ in range(3):
+            Post.objects.create(
+                author=self.admin, text='Тестовый пост', group=self.group
+            )
+        response = self.admin_client.get(
+            reverse('admin:posts_post_changelist')
+        )
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(
+            response, f'<option value="{self.group.pk}" selected>'
+        )
+        self.assertNotContains(response, 'Чужая группа')
+        # Группа для массового переноса тоже выбирается автодополнением.
+        self.assertContains(
+            response, '<select name="group" class="admin-autocomplete"'
+        )
@@ -0,0 +1,156 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts import thumbnails
+from posts.models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+COUNT_TEST_POSTS = 13
+POSTS_ON_PAGE = 10
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_BACKGROUND=False)
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(COUNT_TEST_POSTS):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост № {i}',
+                group=cls.group,
+            )
+        Comment.objects.create(
+            author=cls.user, post=cls.post, text='Тестовый комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feeds_paginate_by_cursor(self):
+        """Ленты API отдают посты страницами по курсору."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:api_profile', kwargs={'username': self.author}),
+            reverse('posts:api_follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.authorized_client.get(url).json()
+                self.assertEqual(len(first['results']), POSTS_ON_PAGE)
+                self.assertEqual(first['results'][0]['id'], self.post.id)
+                second = self.authorized_client.get(
+                    url, {'cursor': first['next_cursor']}
+                ).json()
+                self.assertEqual(
+                    len(second['results']), COUNT_TEST_POSTS - POSTS_ON_PAGE
+                )
+                self.assertIsNone(second['next_cursor'])
+
+    def test_sparse_fields(self):
+        """Параметр fields оставляет в ответе и в запросе только
+        нужные поля.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(
+                reverse('posts:api_index'), {'fields': 'id,text', 'limit': 2}
+            )
+        self.assertEqual(
+            response.json()['results'][0],
+            {'id': self.post.id, 'text': self.post.text},
+        )
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertFalse(
+            any('auth_user' in query['sql'] for query in queries)
+        )
+
+    def test_unknown_field(self):
+        """Неизвестное поле в fields - ошибка 400 с описанием."""
+        response = self.guest_client.get(
+            reverse('posts:api_index'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('password', response.json()['error'])
+
+    def test_post_detail_with_thumbnail(self):
+        """Пост отдаётся с адресом готовой миниатюры картинки."""
+        post = Post.objects.create(
+            author=self.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        thumbnails.generate(post.image.name)
+        response = self.guest_client.get(
+            reverse('posts:api_post_detail', kwargs={'post_id': post.id}),
+            {'fields': 'id,author,image'},
+        )
+        data = response.json()
+        entry = cache.get(thumbnails.cache_key(post.image.name))
+        self.assertEqual(data['author'], self.author.username)
+        self.assertEqual(data['image']['url'], post.image.url)
+        self.assertEqual(data['image']['thumbnail']['url'], entry['url'])
+        self.assertEqual(data['image']['thumbnail']['srcset'], entry['srcset'])
+
+    def test_post_comments(self):
+        """Комментарии поста отдаются отдельной страницей."""
+        response = self.guest_client.get(reverse(
+            'posts:api_post_comments', kwargs={'post_id': self.post.id}
+        ))
+        self.assertEqual(
+            [comment['text'] for comment in response.json()['results']],
+            ['Тестовый комментарий'],
+        )
+
+    def test_missing_objects(self):
+        """Несуществующие пост, группа и автор - ошибка 404, лента
+        подписок - только для авторизованных.
+        """
+        urls = (
+            reverse('posts:api_post_detail', kwargs={'post_id': 0}),
+            reverse('posts:api_group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:api_profile', kwargs={'username': 'missing'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code,
+                    HTTPStatus.NOT_FOUND,
+                )
+        response = self.guest_client.get(reverse('posts:api_follow_index'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertEqual(response.json(), {'error': 'Нужна авторизация'})
@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.caching import FileBasedCache, get_or_compute
+
+TEMP_CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class FileBasedCacheTest(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.cache = FileBasedCache(TEMP_CACHE_DIR, {})
+        self.cache.clear()
+
+    def test_add_does_not_overwrite(self):
+        """add создаёт ключ только один раз."""
+        self.assertTrue(self.cache.add('lock', 1))
+        self.assertFalse(self.cache.add('lock', 2))
+        self.assertEqual(self.cache.get('lock'), 1)
+
+    def test_add_replaces_expired_key(self):
+        """add заменяет просроченный ключ."""
+        self.cache.set('lock', 1, -1)
+        self.assertTrue(self.cache.add('lock', 2))
+        self.assertEqual(self.cache.get('lock'), 2)
+
+    def test_cull_removes_expired_entries_first(self):
+        """При переполнении сначала удаляются просроченные записи, а
+        бессрочные остаются.
+        """
+        small_cache = FileBasedCache(
+            TEMP_CACHE_DIR, {'OPTIONS': {'MAX_ENTRIES': 3}}
+        )
+        for number in range(3):
+            small_cache.set(f'expired{number}', number, 1)
+        small_cache._next_cull = 0
+        with mock.patch('time.time', return_value=time.time() + 2):
+            small_cache.set('eternal', 'значение', None)
+        self.assertEqual(small_cache.get('eternal'), 'значение')
+        self.assertEqual(len(small_cache._list_cache_files()), 1)
+
+    def test_cull_lists_directory_rarely(self):
+        """Каталог кэша перечисляется не при каждом set."""
+        with mock.patch.object(
+            self.cache, '_list_cache_files', return_value=[]
+        ) as listing:
+            for number in range(5):
+                self.cache.set(f'key{number}', number)
+        self.assertEqual(listing.call_count, 1)
+
+
+@override_settings(CACHE_STALE_TIMEOUT=60, CACHE_LOCK_TIMEOUT=0.2)
+class GetOrComputeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.compute = mock.Mock(return_value='новое')
+
+    def test_fresh_value_is_not_recomputed(self):
+        """Свежее значение берётся из кэша."""
+        get_or_compute('key', self.compute, 60)
+        get_or_compute('key', self.compute, 60)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_stale_value_served_while_locked(self):
+        """Пока другой процесс пересчитывает, отдаётся прежнее значение."""
+        cache.set('key', (time.time() - 1, 'старое'))
+        cache.add('key:lock', True)
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'старое')
+        self.compute.assert_not_called()
+
+    def test_stale_value_recomputed_once(self):
+        """Устаревшее значение пересчитывается и блокировка снимается."""
+        cache.set('key', (time.time() - 1, 'старое'))
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'новое')
+        self.assertIsNone(cache.get('key:lock'))
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'новое')
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_miss_waits_for_lock_holder(self):
+        """При пустом кэше без блокировки процесс ждёт чужой результат."""
+        cache.add('key:lock', True)
+
+        def sleep(seconds):
+            cache.set('key', (time.time() + 60, 'чужое'))
+
+        with mock.patch('core.caching.time.sleep', side_effect=sleep):
+            self.assertEqual(get_or_compute('key', self.compute, 60), 'чужое')
+        self.compute.assert_not_called()
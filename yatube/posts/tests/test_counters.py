@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, Group, Post, User, UserCounter
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.another_group = Group.objects.create(
+            title='Котики',
+            slug='cats',
+            description='Любители котиков',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post_author = Client()
+        self.post_author.force_login(self.author)
+
+    def counters(self, user):
+        return UserCounter.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Создание, перенос и удаление поста меняют счётчики."""
+        self.post_author.post(
+            reverse('posts:post_create'),
+            data={'text': 'Тестовый пост', 'group': self.group.id},
+        )
+        post = Post.objects.get()
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+        self.post_author.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': 'Тестовый пост', 'group': self.another_group.id},
+        )
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.another_group.posts_count, 1)
+
+        post.refresh_from_db()
+        post.delete()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.counters(self.author).posts_count, 0)
+        self.assertEqual(self.another_group.posts_count, 0)
+
+    def test_comment_counter(self):
+        """Комментарий увеличивает счётчик комментариев поста."""
+        post = Post.objects.create(author=self.author, text='Тестовый пост')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.id}),
+            data={'text': 'Тестовый комментарий'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        post.comments.get().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счётчики подписчиков и подписок."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author})
+        )
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.user).following_count, 1)
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': self.author})
+        )
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.user).following_count, 0)
+
+    def test_reconcile_counters_repairs_drift(self):
+        """Команда reconcile_counters исправляет расхождения счётчиков."""
+        post = Post.objects.create(
+            author=self.author, text='Тестовый пост', group=self.group
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=7)
+        UserCounter.objects.filter(user=self.author).update(posts_count=0)
+        UserCounter.objects.filter(user=self.user).delete()
+
+        call_command('reconcile_counters', stdout=StringIO())
+
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.user).following_count, 1)
+
+    def test_profile_reads_counters_without_counting(self):
+        """Профиль выводит число постов из счётчика автора."""
+        Post.objects.create(author=self.author, text='Тестовый пост')
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Всего постов: 1')
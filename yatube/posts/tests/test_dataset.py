@@ -0,0 +1,72 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from posts.models import Comment, Follow, Group, Post, User, UserCounter
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_BACKGROUND=False)
+class DatasetBenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'generate_dataset', users=10, groups=2, posts=60, comments=40,
+            follows=3, images=2, image_ratio=0.5, seed=1, stdout=StringIO(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_generate_dataset(self):
+        """Генератор создаёт связанные данные со смещённым
+        распределением постов и согласованными счётчиками.
+        """
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        counts = sorted(
+            UserCounter.objects.values_list('posts_count', flat=True),
+            reverse=True,
+        )
+        self.assertEqual(sum(counts), 60)
+        self.assertGreater(counts[0], 60 / 10)
+        post = Post.objects.exclude(comments=None).first()
+        self.assertEqual(post.comments_count, post.comments.count())
+        self.assertTrue(
+            all(comment.pub_date >= post.pub_date
+                for comment in post.comments.all())
+        )
+
+    def test_benchmark_report(self):
+        """Замер обходит маршруты и отдаёт JSON с задержками и числом
+        запросов к базе.
+        """
+        stdout = StringIO()
+        call_command(
+            'benchmark', requests=3, warmup=0,
+            routes=['index', 'post_detail', 'profile_follow'],
+            stdout=stdout, stderr=StringIO(),
+        )
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(
+            list(report['routes']), ['index', 'post_detail', 'profile_follow']
+        )
+        for name, result in report['routes'].items():
+            with self.subTest(route=name):
+                self.assertEqual(result['requests'], 3)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertGreater(result['queries'], 0)
+        self.assertEqual(report['routes']['index']['status'], [200])
+        self.assertEqual(report['total']['requests'], 9)
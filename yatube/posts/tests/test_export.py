@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Пост с "кавычками", запятой\nи переносом',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other, text='Чужой пост'
+        )
+        Comment.objects.create(
+            author=cls.author, post=cls.other_post, text='Мой комментарий'
+        )
+        Comment.objects.create(
+            author=cls.other, post=cls.post, text='Чужой комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.post_author = Client()
+        self.post_author.force_login(self.author)
+
+    def export(self, **params):
+        response = self.post_author.get(reverse('posts:export'), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_export(self):
+        """Выгрузка NDJSON содержит только посты и комментарии автора."""
+        response, content = self.export()
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [(row['type'], row['text']) for row in rows],
+            [('post', self.post.text), ('comment', 'Мой комментарий')],
+        )
+        self.assertEqual(rows[0]['image'], self.post.image.name)
+        self.assertEqual(rows[1]['post_id'], self.other_post.pk)
+        self.assertIn('author.ndjson', response['Content-Disposition'])
+
+    def test_csv_export(self):
+        """Выгрузка CSV читается стандартным csv с заголовком."""
+        _, content = self.export(format='csv')
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(
+            [row['text'] for row in rows],
+            [self.post.text, 'Мой комментарий'],
+        )
+
+    def test_archive_with_media(self):
+        """Архив содержит выгрузку и картинки постов автора."""
+        response, content = self.export(media=1)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIn('Мой комментарий', archive.read(
+                'author.ndjson'
+            ).decode())
+            self.assertEqual(
+                archive.read(f'media/{self.post.image.name}'), SMALL_GIF
+            )
+
+    def test_export_access(self):
+        """Выгрузка только для авторизованных и в известных форматах."""
+        response = Client().get(reverse('posts:export'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.post_author.get(
+            reverse('posts:export'), {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_export_command(self):
+        """Команда export_user пишет архив в файл."""
+        path = os.path.join(TEMP_MEDIA_ROOT, 'export.zip')
+        call_command(
+            'export_user', 'author', format='csv', media=True, output=path
+        )
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                ['author.csv', f'media/{self.post.image.name}'],
+            )
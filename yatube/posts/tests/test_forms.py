@@ -1,12 +1,16 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 from posts.models import Comment, Group, Post, User
 
+ORIENTATION = 0x0112
+MAKE = 0x010F
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
@@ -67,7 +71,9 @@ class PostFormTests(TestCase):
         self.assertEqual(latest_post.text, form_data['text'])
         self.assertEqual(latest_post.group.id, form_data['group'])
         self.assertEqual(latest_post.author, self.user)
-        self.assertEqual(latest_post.image, 'posts/small.gif')
+        self.assertRegex(
+            latest_post.image.name, r'^posts/\w\w/\w\w/\w{64}\.gif$'
+        )
 
     def test_edit_post(self):
         """Валидная форма вносит изменения в существующую запись в Post."""
@@ -133,3 +139,87 @@ class PostFormTests(TestCase):
         self.assertEqual(latest_comment.text, form_data['text'])
         self.assertEqual(latest_comment.author, self.user)
         self.assertEqual(latest_comment.post, self.post)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIDE=100)
+class ImageIngestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.post_author = Client()
+        self.post_author.force_login(self.author)
+
+    def upload(self, size, image_format='JPEG', exif=None):
+        file = BytesIO()
+        options = {'exif': exif} if exif else {}
+        Image.new('RGB', size, 'red').save(file, image_format, **options)
+        return SimpleUploadedFile(
+            name='photo.jpg',
+            content=file.getvalue(),
+            content_type='image/jpeg',
+        )
+
+    def create_post(self, image):
+        return self.post_author.post(
+            reverse('posts:post_create'),
+            data={'text': 'Тестовый пост', 'image': image},
+        )
+
+    def test_large_image_downscaled(self):
+        """Большая картинка уменьшается до POST_IMAGE_MAX_SIDE."""
+        self.create_post(self.upload((400, 200)))
+        post = Post.objects.get()
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (100, 50))
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+
+    def test_exif_orientation_applied_and_stripped(self):
+        """Картинка поворачивается по EXIF, а метаданные удаляются."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        exif[MAKE] = 'Тестовая камера'
+        self.create_post(self.upload((80, 40), exif=exif))
+        with Image.open(Post.objects.get().image) as image:
+            self.assertEqual(image.size, (40, 80))
+            self.assertFalse(image.getexif())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_rejected(self):
+        """Картинка с большим числом пикселей отклоняется."""
+        response = self.create_post(self.upload((100, 100)))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Картинка слишком большая по числу пикселей.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_unsupported_format_rejected(self):
+        """Картинка неподдерживаемого формата отклоняется."""
+        response = self.create_post(self.upload((10, 10), 'BMP'))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Поддерживаются картинки JPEG, PNG, WebP и GIF.'
+        )
+
+    def test_truncated_image_rejected(self):
+        """Обрезанный файл, который проходит проверку заголовка,
+        отклоняется при декодировании.
+        """
+        content = self.upload((80, 40)).read()
+        response = self.create_post(SimpleUploadedFile(
+            name='photo.jpg',
+            content=content[:-10],
+            content_type='image/jpeg',
+        ))
+        self.assertFormError(
+            response, 'form', 'image', 'Файл картинки повреждён.'
+        )
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,212 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+from posts import search
+from posts.models import (Follow, Group, Post, TimelineEntry, User,
+                          UserCounter)
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(TEMP_DIR, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def test_import_ndjson(self):
+        """Импорт создаёт строки пачками и в конце обновляет счётчики,
+        ленты подписчиков и индекс поиска.
+        """
+        records = [
+            {'type': 'group', 'slug': 'cats', 'title': 'Котики'},
+            {'type': 'follow', 'user': 'reader', 'author': 'legacy'},
+            {'type': 'post', 'author': 'legacy', 'group': 'cats',
+             'text': 'Старый пост про котиков',
+             'pub_date': '2015-03-01T10:00:00+00:00'},
+            {'type': 'post', 'author': 'legacy', 'text': 'Ещё пост'},
+            {'type': 'post', 'author': 'legacy', 'group': 'missing',
+             'text': 'Пост в несуществующей группе'},
+            {'type': 'follow', 'user': 'legacy', 'author': 'legacy'},
+        ]
+        path = self.write('import.ndjson', '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records
+        ))
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command(
+            'import_posts', path, batch_size=2, create_users=True,
+            stdout=stdout, stderr=stderr,
+        )
+
+        legacy = User.objects.get(username='legacy')
+        group = Group.objects.get(slug='cats')
+        post = Post.objects.get(text='Старый пост про котиков')
+        self.assertEqual(post.group, group)
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(legacy.posts.count(), 2)
+        self.assertEqual(group.posts_count, 1)
+        self.assertEqual(legacy.counters.posts_count, 2)
+        self.assertEqual(legacy.counters.followers_count, 1)
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=legacy).exists()
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(
+            list(search.filter_posts(Post.objects.all(), 'котиков')), [post]
+        )
+        self.assertIn(
+            'Импортировано строк: 4, пропущено: 2', stdout.getvalue()
+        )
+        self.assertIn('строк/с', stdout.getvalue())
+        self.assertIn('строка 5: нет группы', stderr.getvalue())
+        self.assertIn('строка 6: подписка на себя', stderr.getvalue())
+
+    def test_import_csv_requires_known_users(self):
+        """Без --create-users посты неизвестных авторов пропускаются."""
+        path = self.write(
+            'import.csv',
+            'type,author,text\n'
+            'post,reader,Пост читателя\n'
+            'post,stranger,Пост незнакомца\n',
+        )
+        stderr = StringIO()
+
+        call_command('import_posts', path, stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['Пост читателя'],
+        )
+        self.assertIn("нет пользователя 'stranger'", stderr.getvalue())
+        self.assertEqual(
+            UserCounter.objects.get(user=self.reader).posts_count, 1
+        )
+
+    def test_malformed_lines_are_reported(self):
+        """Неразбираемые строки пропускаются с номером строки файла, а
+        остальные импортируются.
+        """
+        path = self.write('broken.ndjson', '\n'.join([
+            json.dumps({'type': 'post', 'author': 'reader', 'text': 'Один'}),
+            '',
+            '{"type": "post", "author": ',
+            '[1]',
+            json.dumps({'type': 'post', 'author': 'reader', 'text': 'Два',
+                        'pub_date': '2020-13-45T00:00:00'}),
+            json.dumps({'type': 'post', 'author': 'reader', 'text': 'Три'}),
+        ]))
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command(
+            'import_posts', path, stdout=stdout, stderr=stderr,
+        )
+
+        self.assertCountEqual(
+            Post.objects.values_list('text', flat=True), ['Один', 'Три']
+        )
+        self.assertIn('строка 3: неверный JSON', stderr.getvalue())
+        self.assertIn(
+            'строка 4: запись не является объектом', stderr.getvalue()
+        )
+        self.assertIn('строка 5: неверная дата', stderr.getvalue())
+        self.assertIn(
+            'Импортировано строк: 2, пропущено: 3', stdout.getvalue()
+        )
+
+    def test_wrong_field_types_are_reported(self):
+        """Записи с полями не строкового типа пропускаются."""
+        path = self.write('types.ndjson', '\n'.join([
+            json.dumps({'type': 'post', 'author': ['reader'], 'text': 'Один'}),
+            json.dumps({'type': 'post', 'author': 'reader', 'text': 'Два',
+                        'pub_date': 1700000000}),
+            json.dumps({'type': ['post'], 'author': 'reader', 'text': 'Три'}),
+            json.dumps({'type': 'post', 'author': 'reader', 'text': 'Четыре',
+                        'group': None}),
+        ]))
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command(
+            'import_posts', path, stdout=stdout, stderr=stderr,
+        )
+
+        self.assertCountEqual(
+            Post.objects.values_list('text', flat=True), ['Четыре']
+        )
+        for number, field in ((1, 'author'), (2, 'pub_date'), (3, 'type')):
+            self.assertIn(
+                f"строка {number}: поле '{field}' должно быть строкой",
+                stderr.getvalue(),
+            )
+        self.assertIn(
+            'Импортировано строк: 1, пропущено: 3', stdout.getvalue()
+        )
+
+    def test_csv_errors_use_file_lines(self):
+        """Номер строки CSV учитывает заголовок."""
+        path = self.write(
+            'lines.csv',
+            'type,author,text\n'
+            'post,reader,Пост читателя\n'
+            'post,stranger,Пост незнакомца\n',
+        )
+        stderr = StringIO()
+
+        call_command('import_posts', path, stdout=StringIO(), stderr=stderr)
+
+        self.assertIn(
+            "строка 3: нет пользователя 'stranger'", stderr.getvalue()
+        )
+
+    def test_interrupted_import_refreshes_committed_rows(self):
+        """Если импорт прерван, уже записанные пачки всё равно попадают
+        в счётчики и поиск.
+        """
+        path = self.write('interrupted.ndjson', '\n'.join(
+            json.dumps({'type': 'post', 'author': 'reader', 'text': text})
+            for text in ('Первый импортированный', 'Второй')
+        ))
+        original = Post.objects.bulk_create
+        calls = []
+
+        def fail_second_batch(objects, *args, **kwargs):
+            calls.append(objects)
+            if len(calls) == 2:
+                raise RuntimeError('обрыв соединения')
+            return original(objects, *args, **kwargs)
+
+        with mock.patch.object(
+            Post.objects, 'bulk_create', side_effect=fail_second_batch
+        ), self.assertRaises(RuntimeError):
+            call_command(
+                'import_posts', path, batch_size=1,
+                stdout=StringIO(), stderr=StringIO(),
+            )
+
+        self.assertEqual(
+            UserCounter.objects.get(user=self.reader).posts_count, 1
+        )
+        self.assertEqual(
+            len(search.filter_posts(Post.objects.all(), 'импортированный')),
+            1,
+        )
@@ -0,0 +1,198 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts import jobs, search
+from posts.models import (BulkJob, Comment, Follow, Group, Post,
+                          TimelineEntry, User, UserCounter)
+
+
+@override_settings(BULK_JOB_BATCH_SIZE=2)
+class BulkJobTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.another_group = Group.objects.create(
+            title='Котики',
+            slug='cats',
+            description='Любители котиков',
+        )
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def create_author(self, username, posts=5):
+        author = User.objects.create_user(username=username)
+        Follow.objects.create(user=self.user, author=author)
+        Follow.objects.create(user=author, author=self.user)
+        for i in range(posts):
+            post = Post.objects.create(
+                author=author, text=f'Пост номер {i}', group=self.group
+            )
+            Comment.objects.create(
+                author=self.user, post=post, text='Комментарий'
+            )
+        user_post = Post.objects.create(author=self.user, text='Пост')
+        Comment.objects.create(author=author, post=user_post, text='Ответ')
+        return author
+
+    def indexed(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {search.TABLE} WHERE rowid IN '
+                f'({", ".join(map(str, post_ids))})'
+            )
+            return cursor.fetchone()[0]
+
+    def test_admin_action_queues_job(self):
+        """Действие админки создаёт фоновое задание, а не меняет посты."""
+        author = self.create_author('author')
+        response = self.admin_client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'move_to_group',
+                'group': self.another_group.pk,
+                '_selected_action': list(
+                    author.posts.values_list('pk', flat=True)
+                ),
+            },
+            follow=True,
+        )
+        job = BulkJob.objects.get()
+        self.assertContains(
+            response, reverse('admin:posts_bulkjob_change', args=(job.pk,))
+        )
+        self.assertEqual(job.action, BulkJob.MOVE_POSTS)
+        self.assertEqual(job.group, self.another_group)
+        self.assertEqual(job.total, 5)
+        self.assertEqual(author.posts.filter(group=self.group).count(), 5)
+
+    def test_move_posts(self):
+        """Перенос в группу идёт пачками и обновляет счётчики групп."""
+        author = self.create_author('author')
+        job = jobs.create(
+            BulkJob.MOVE_POSTS, author.posts.all(), group=self.another_group
+        )
+
+        self.assertTrue(jobs.run_safely(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkJob.DONE)
+        self.assertEqual((job.position, job.changed), (5, 5))
+        self.assertEqual(
+            author.posts.filter(group=self.another_group).count(), 5
+        )
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.another_group.posts_count, 5)
+
+    def test_delete_users(self):
+        """Удаление пользователя убирает его посты, комментарии, подписки
+        и записи ленты, сохраняя счётчики остальных.
+        """
+        author = self.create_author('author')
+        post_ids = list(author.posts.values_list('pk', flat=True))
+        job = jobs.create(
+            BulkJob.DELETE_USERS, User.objects.filter(pk=author.pk)
+        )
+
+        jobs.run_safely(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkJob.DONE)
+        self.assertFalse(User.objects.filter(pk=author.pk).exists())
+        self.assertFalse(Post.objects.filter(pk__in=post_ids).exists())
+        self.assertFalse(Comment.objects.filter(post__in=post_ids).exists())
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__in=post_ids).exists()
+        )
+        self.assertEqual(self.indexed(post_ids), 0)
+        counter = UserCounter.objects.get(user=self.user)
+        self.assertEqual(
+            (counter.followers_count, counter.following_count), (0, 0)
+        )
+        self.assertEqual(Post.objects.get(author=self.user).comments_count, 0)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+
+    def test_purge_users_keeps_account(self):
+        """Очистка удаляет посты и комментарии, но не пользователя."""
+        author = self.create_author('author')
+        job = jobs.create(
+            BulkJob.PURGE_USERS, User.objects.filter(pk=author.pk)
+        )
+
+        jobs.run_safely(job.pk)
+
+        self.assertTrue(User.objects.filter(pk=author.pk).exists())
+        self.assertFalse(author.posts.exists())
+        self.assertFalse(author.comments.exists())
+        self.assertEqual(
+            UserCounter.objects.get(user=author).posts_count, 0
+        )
+        self.assertTrue(Follow.objects.filter(author=author).exists())
+
+    def test_interrupted_job_resumes(self):
+        """Прерванное задание продолжается командой run_bulk_jobs, а
+        выполняемое в другом процессе не запускается повторно.
+        """
+        first = self.create_author('first', posts=1)
+        second = self.create_author('second', posts=1)
+        job = jobs.create(
+            BulkJob.DELETE_POSTS,
+            Post.objects.filter(author__in=(first, second)),
+        )
+        BulkJob.objects.filter(pk=job.pk).update(
+            status=BulkJob.RUNNING, position=1
+        )
+        self.assertFalse(jobs.run_safely(job.pk))
+
+        BulkJob.objects.filter(pk=job.pk).update(
+            updated=timezone.now() - timedelta(days=1)
+        )
+        stdout = StringIO()
+        call_command('run_bulk_jobs', stdout=stdout)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkJob.DONE)
+        self.assertIn('обработано 2 из 2', stdout.getvalue())
+        self.assertTrue(first.posts.exists())
+        self.assertFalse(second.posts.exists())
+
+    def test_request_runs_one_batch(self):
+        """После запроса выполняется одна пачка, а остальное доделывает
+        команда run_bulk_jobs.
+        """
+        author = self.create_author('author')
+        job = jobs.create(BulkJob.DELETE_POSTS, author.posts.all())
+
+        jobs.start_request()
+        jobs.defer(job.pk)
+        with override_settings(BULK_JOB_REQUEST_BATCHES=1):
+            jobs.finish_request()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkJob.PENDING)
+        self.assertEqual(job.changed, 2)
+        self.assertEqual(author.posts.count(), 5)
+
+        call_command('run_bulk_jobs', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkJob.DONE)
+        self.assertFalse(author.posts.exists())
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+
+from core import benchmark
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from posts import benchmarks
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ROUNDS = 3
+MIN_TIME = 0.0001
+
+
+class BenchmarkHarnessTest(SimpleTestCase):
+    def test_measure(self):
+        """Замер повторяет вызов раундами и отдаёт статистику."""
+        calls = []
+        stats = benchmark.measure(
+            lambda: calls.append(1), rounds=ROUNDS, min_time=MIN_TIME
+        )
+        self.assertEqual(stats['rounds'], ROUNDS)
+        self.assertGreaterEqual(stats['iterations'], 1)
+        self.assertLessEqual(stats['min'], stats['median'])
+        self.assertLessEqual(stats['median'], stats['max'])
+        self.assertGreater(len(calls), ROUNDS * stats['iterations'])
+
+    def test_compare_flags_regressions(self):
+        """Регрессия - замедление лучшего раунда больше порога; замеры
+        без базовой линии не сравниваются.
+        """
+        baseline = {'fast': {'min': 1.0}, 'slow': {'min': 1.0}}
+        results = {
+            'fast': {'min': 1.1},
+            'slow': {'min': 1.5},
+            'new': {'min': 1.0},
+        }
+        changes = benchmark.compare(results, baseline, 0.2)
+        self.assertEqual(set(changes), {'fast', 'slow'})
+        self.assertFalse(changes['fast'][1])
+        self.assertTrue(changes['slow'][1])
+        self.assertAlmostEqual(changes['slow'][0], 0.5)
+
+    def test_baseline_roundtrip(self):
+        """Базовая линия сохраняется в JSON и читается обратно."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'nested', 'baseline.json')
+        results = {'case': {'min': 0.5, 'median': 0.6}}
+        benchmark.save_baseline(path, results, commit='abc1234')
+        self.assertEqual(benchmark.load_baseline(path), results)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_BACKGROUND=False)
+class MicrobenchmarkSuiteTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_run_selected_cases(self):
+        """Набор создаёт постоянные данные и замеряет выбранные случаи."""
+        reported = []
+        names = [
+            'card_posts', 'card_posts_uncached', 'thumbnail_tag',
+            'addclass_select', 'cursor_paginator_get_page',
+        ]
+        results = benchmarks.run(
+            names, ROUNDS, MIN_TIME,
+            lambda name, stats: reported.append(name),
+        )
+        self.assertEqual(list(results), names)
+        self.assertEqual(reported, names)
+
+    def test_every_case_renders(self):
+        """Каждый зарегистрированный случай выполняется без ошибок."""
+        fixtures = benchmarks.create_fixtures()
+        for name, (setup, overrides) in benchmarks.CASES.items():
+            with self.subTest(case=name), override_settings(**overrides):
+                setup(fixtures)()
@@ -0,0 +1,167 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from core.paginators import (CachedCountPaginator, CursorPage,
+                             CursorPaginator)
+from posts.counters import feed_count_key
+from posts.models import Group, Post, User
+
+COUNT_TEST_POSTS = 25
+POSTS_ON_PAGE = 10
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([
+            Post(author=cls.author, text=f'Тестовый пост № {i}',
+                 group=cls.group)
+            for i in range(COUNT_TEST_POSTS)
+        ])
+        # Часть постов с одинаковой датой, чтобы проверить разбор по id.
+        same_date = timezone.now() - timedelta(days=1)
+        Post.objects.filter(pk__in=Post.objects.values('pk')[5:15]).update(
+            pub_date=same_date
+        )
+
+    def setUp(self):
+        self.post_author = Client()
+        self.post_author.force_login(self.author)
+
+    def walk(self, paginator):
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        return pages
+
+    def test_cursor_pages_cover_feed_in_order(self):
+        """Курсорные страницы проходят всю ленту без пропусков и повторов."""
+        post_list = Post.objects.all()
+        pages = self.walk(CursorPaginator(post_list, POSTS_ON_PAGE))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        seen = [post for page in pages for post in page]
+        expected = list(post_list.order_by('-pub_date', '-pk'))
+        self.assertEqual(seen, expected)
+        self.assertFalse(pages[0].has_previous())
+        self.assertFalse(pages[-1].has_next())
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор назад возвращает ту же предыдущую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_ON_PAGE)
+        pages = self.walk(paginator)
+        for previous, current in zip(pages, pages[1:]):
+            with self.subTest(cursor=current.cursor):
+                back = paginator.get_page(current.previous_cursor)
+                self.assertEqual(list(back), list(previous))
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_ON_PAGE)
+        for cursor in ('мусор', 'bnwxfDE=', '!!!'):
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual(list(page), list(paginator.get_page()))
+
+    def test_cursor_query_is_index_seek(self):
+        """Выборка страницы идёт поиском по индексу pub_date без OFFSET."""
+        paginator = CursorPaginator(
+            Post.objects.select_related('group', 'author'), POSTS_ON_PAGE
+        )
+        cursor = paginator.get_page().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            paginator.get_page(cursor)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(f'EXPLAIN QUERY PLAN {queries[0]["sql"]}')
+            plan = ' '.join(str(row[-1]) for row in db_cursor.fetchall())
+        self.assertIn('USING INDEX posts_post_pub_date', plan)
+        self.assertIn('pub_date<', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_feeds_use_cursor_pagination_on_request(self):
+        """Ленты переходят на курсорную пагинацию по параметру cursor."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.post_author.get(url, {'cursor': ''})
+                page_obj = response.context['page_obj']
+                self.assertIsInstance(page_obj, CursorPage)
+                self.assertEqual(len(page_obj), POSTS_ON_PAGE)
+                response = self.post_author.get(
+                    url, {'cursor': page_obj.next_cursor}
+                )
+                self.assertEqual(len(response.context['page_obj']), 10)
+                self.assertContains(response, '?cursor=')
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.bulk_create([
+            Post(author=cls.author, text=f'Тестовый пост № {i}')
+            for i in range(COUNT_TEST_POSTS)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_elided_page_range(self):
+        """Номера страниц выводятся окном с пропусками."""
+        paginator = CachedCountPaginator(range(500), POSTS_ON_PAGE)
+        ellipsis = paginator.ELLIPSIS
+        pages_expected = {
+            1: [1, 2, 3, ellipsis, 50],
+            25: [1, ellipsis, 23, 24, 25, 26, 27, ellipsis, 50],
+            50: [1, ellipsis, 48, 49, 50],
+        }
+        for number, expected in pages_expected.items():
+            with self.subTest(number=number):
+                page = paginator.get_page(number)
+                self.assertEqual(page.elided_page_range, expected)
+
+    def test_count_is_cached(self):
+        """Число записей считается один раз на ключ кэша."""
+        key = feed_count_key('index')
+        paginator = CachedCountPaginator(Post.objects.all(), POSTS_ON_PAGE,
+                                         count_key=key)
+        self.assertEqual(paginator.count, COUNT_TEST_POSTS)
+        paginator = CachedCountPaginator(Post.objects.all(), POSTS_ON_PAGE,
+                                         count_key=key)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(paginator.count, COUNT_TEST_POSTS)
+        self.assertEqual(len(queries), 0)
+
+    def test_new_post_invalidates_cached_count(self):
+        """Новый пост сбрасывает закэшированное число записей ленты."""
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, COUNT_TEST_POSTS
+        )
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            COUNT_TEST_POSTS + 1
+        )
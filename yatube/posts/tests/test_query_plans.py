@@ -0,0 +1,133 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+COUNT_TEST_POSTS = 15
+COUNT_TEST_COMMENTS = 25
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!subquery)\w+$', re.MULTILINE)
+
+
+def explain(sql):
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [str(row[-1]) for row in db_cursor.fetchall()]
+
+
+class QueryPlanTest(TestCase):
+    """Запросы страниц читают таблицы по индексам и без сортировки
+    во временном B-дереве.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(COUNT_TEST_POSTS):
+            post = Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост № {i}',
+                group=cls.group,
+            )
+            Comment.objects.create(
+                author=cls.user,
+                post=post,
+                text='Тестовый комментарий',
+            )
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assert_plans_use_indexes(self, url, data=None, sorted_ok=False):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url, data)
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            plan = explain(sql)
+            with self.subTest(url=url, sql=sql, plan=plan):
+                plan_text = '\n'.join(plan)
+                self.assertIsNone(FULL_SCAN.search(plan_text))
+                if not sorted_ok:
+                    self.assertNotIn('TEMP B-TREE', plan_text)
+
+    def test_feeds_query_plans(self):
+        """Ленты с нумерованными страницами читаются по индексам."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            for page in (1, 2):
+                self.assert_plans_use_indexes(url, {'page': page})
+
+    def test_cursor_feeds_query_plans(self):
+        """Ленты с курсорной пагинацией читаются по индексам."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            response = self.authorized_client.get(url, {'cursor': ''})
+            cursor = response.context['page_obj'].next_cursor
+            self.assert_plans_use_indexes(url, {'cursor': cursor})
+
+    def test_post_detail_query_plans(self):
+        """Страница поста и комментарии к нему читаются по индексам."""
+        self.assert_plans_use_indexes(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        Comment.objects.bulk_create(
+            Comment(author=self.user, post=self.post, text='Комментарий')
+            for _ in range(COUNT_TEST_COMMENTS)
+        )
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.id})
+        response = self.authorized_client.get(url)
+        self.assert_plans_use_indexes(
+            url, {'cursor': response.context['comments'].next_cursor}
+        )
+
+    def test_search_query_plans(self):
+        """Поиск читает посты по индексу FTS и первичному ключу.
+
+        Сортировка по bm25 всё равно оценивает все совпадения, поэтому
+        временное B-дерево здесь допустимо.
+        """
+        url = reverse('posts:search')
+        data = {'q': 'тестовый', 'group': self.group.slug}
+        self.assert_plans_use_indexes(url, data, sorted_ok=True)
+        response = self.authorized_client.get(url, data)
+        data['cursor'] = response.context['page_obj'].next_cursor
+        self.assert_plans_use_indexes(url, data, sorted_ok=True)
+
+    def test_api_query_plans(self):
+        """Ленты API читаются по тем же индексам, что и страницы."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:api_profile', kwargs={'username': self.author}),
+            reverse('posts:api_follow_index'),
+        )
+        for url in urls:
+            response = self.authorized_client.get(url)
+            cursor = response.json()['next_cursor']
+            self.assert_plans_use_indexes(url, {'cursor': cursor})
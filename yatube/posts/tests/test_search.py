@@ -0,0 +1,110 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import search
+from posts.models import Group, Post, User
+
+POSTS_ON_PAGE = 10
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.another_author = User.objects.create_user(username='another')
+        cls.group = Group.objects.create(
+            title='Котики',
+            slug='cats',
+            description='Любители котиков',
+        )
+        cls.cat_post = Post.objects.create(
+            author=cls.author,
+            text='Рыжий котёнок спит на <b>подоконнике</b>',
+            group=cls.group,
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.another_author,
+            text='Собака лает на котёнка',
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, **params):
+        return self.client.get(reverse('posts:search'), params)
+
+    def found(self, response):
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_search_highlights_matches(self):
+        """Найденное слово подсвечивается, а текст поста экранируется."""
+        response = self.search(q='рыжий')
+        self.assertEqual(self.found(response), [self.cat_post.pk])
+        self.assertContains(response, '<mark>Рыжий</mark>')
+        self.assertContains(response, '&lt;b&gt;подоконнике&lt;/b&gt;')
+
+    def test_last_word_matches_prefix(self):
+        """Последнее слово запроса ищется как начало слова."""
+        response = self.search(q='котён')
+        self.assertCountEqual(
+            self.found(response), [self.cat_post.pk, self.dog_post.pk]
+        )
+
+    def test_filters(self):
+        """Результаты фильтруются по группе и автору."""
+        response = self.search(q='котён', group=self.group.slug)
+        self.assertEqual(self.found(response), [self.cat_post.pk])
+        response = self.search(q='котён', author='another')
+        self.assertEqual(self.found(response), [self.dog_post.pk])
+
+    def test_unknown_group_filter(self):
+        """Фильтр по несуществующей группе не находит ничего."""
+        response = self.search(q='котён', group='no-such-group')
+        self.assertEqual(self.found(response), [])
+
+    def test_unknown_author_filter(self):
+        """Фильтр по несуществующему автору не находит ничего."""
+        response = self.search(q='котён', author='no_such_user')
+        self.assertEqual(self.found(response), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        dog_post = Post.objects.get(pk=self.dog_post.pk)
+        dog_post.text = 'Собака лает на почтальона'
+        dog_post.save()
+        self.assertEqual(self.found(self.search(q='почтальона')), [
+            self.dog_post.pk
+        ])
+        self.assertEqual(self.found(self.search(q='котёнка')), [])
+        Post.objects.get(pk=self.cat_post.pk).delete()
+        self.assertEqual(self.found(self.search(q='рыжий')), [])
+
+    def test_cursor_pagination(self):
+        """Курсор проходит все результаты без повторов и обратно."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Тестовый пост {i}')
+            for i in range(POSTS_ON_PAGE + 5)
+        )
+        search.rebuild()
+
+        first = self.search(q='тестовый').context['page_obj']
+        self.assertEqual(len(first), POSTS_ON_PAGE)
+        second = self.search(
+            q='тестовый', cursor=first.next_cursor
+        ).context['page_obj']
+        self.assertEqual(len(second), 5)
+        self.assertFalse(second.has_next())
+        self.assertFalse(
+            {post.pk for post in first} & {post.pk for post in second}
+        )
+        back = self.search(
+            q='тестовый', cursor=second.previous_cursor
+        ).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in back], [post.pk for post in first]
+        )
+
+    def test_empty_query(self):
+        """Пустой запрос не выводит результатов."""
+        response = self.search()
+        self.assertEqual(self.found(response), [])
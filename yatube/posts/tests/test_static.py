@@ -0,0 +1,57 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, override_settings
+from django.urls import reverse
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class StaticPipelineTest(SimpleTestCase):
+    databases = {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def test_manifest_maps_to_hashed_names(self):
+        """collectstatic пишет манифест с хэшированными именами."""
+        path = os.path.join(TEMP_STATIC_ROOT, 'staticfiles.json')
+        with open(path) as manifest:
+            paths = json.load(manifest)['paths']
+        self.assertRegex(
+            paths['css/bootstrap.min.css'],
+            r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$'
+        )
+
+    def test_text_files_precompressed(self):
+        """Рядом с хэшированным CSS лежит сжатая gzip копия."""
+        name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        with staticfiles_storage.open(name) as original:
+            content = original.read()
+        with staticfiles_storage.open(f'{name}.gz') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), content)
+        self.assertFalse(staticfiles_storage.exists('img/logo.png.gz'))
+
+    def test_templates_use_hashed_names(self):
+        """Шаблоны ссылаются на хэшированные имена статики."""
+        response = Client().get(reverse('about:author'))
+        self.assertContains(
+            response,
+            staticfiles_storage.url('css/bootstrap.min.css'),
+        )
+        self.assertNotContains(response, '/static/css/bootstrap.min.css"')
@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from posts import thumbnails
+from posts.models import Post, User
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.storage = Post._meta.get_field('image').storage
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.author,
+            text='Тестовый пост',
+            image=SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    def test_same_content_stored_once(self):
+        """Одинаковые картинки хранятся в одном файле по хэшу содержимого."""
+        first = self.create_post('котик.GIF')
+        second = self.create_post('копия.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name, r'^posts/(\w\w)/(\w\w)/\1\2\w{60}\.gif$'
+        )
+        self.assertTrue(self.storage.exists(first.image.name))
+
+    def test_shard_media_moves_flat_files(self):
+        """Команда shard_media переносит старые файлы и объединяет копии."""
+        for name in ('posts/котик.gif', 'posts/копия.gif'):
+            default_storage.save(name, ContentFile(SMALL_GIF))
+            Post.objects.create(
+                author=self.author, text='Тестовый пост', image=name
+            )
+        Post.objects.create(
+            author=self.author, text='Тестовый пост', image='posts/нет.gif'
+        )
+
+        cache.clear()
+        thumbnails.generate('posts/котик.gif')
+
+        call_command('shard_media', stdout=StringIO(), stderr=StringIO())
+
+        names = set(
+            Post.objects.exclude(image='posts/нет.gif').values_list(
+                'image', flat=True
+            )
+        )
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(self.storage.is_content_name(name))
+        self.assertTrue(self.storage.exists(name))
+        self.assertFalse(default_storage.exists('posts/котик.gif'))
+        self.assertFalse(default_storage.exists('posts/копия.gif'))
+        self.assertIsNone(default.kvstore.get(ImageFile('posts/котик.gif')))
+        self.assertIsNone(cache.get(thumbnails.cache_key('posts/котик.gif')))
+
+    def test_collect_orphans(self):
+        """collect_orphans удаляет старые файлы без постов и их миниатюры."""
+        cache.clear()
+        post = self.create_post('котик.gif')
+        orphan = post.image.name
+        old = time.time() - 2 * 24 * 60 * 60
+        os.utime(self.storage.path(orphan), (old, old))
+        thumbnails.generate(orphan)
+        Post.objects.filter(pk=post.pk).update(image='')
+        young = self.storage.save('posts/новый.gif', ContentFile(b'GIF89a'))
+        kept = self.storage.save('posts/пост.gif', ContentFile(b'GIF87a'))
+        Post.objects.create(author=self.author, text='Пост', image=kept)
+        os.utime(self.storage.path(kept), (old, old))
+        stdout = StringIO()
+
+        with mock.patch.object(default.kvstore, 'cleanup') as cleanup:
+            call_command('collect_orphans', stdout=stdout)
+
+        cleanup.assert_not_called()
+
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertIsNone(default.kvstore.get(ImageFile(orphan)))
+        self.assertIsNone(cache.get(thumbnails.cache_key(orphan)))
+        self.assertTrue(self.storage.exists(young))
+        self.assertTrue(self.storage.exists(kept))
+        self.assertIn('Удалено картинок: 1', stdout.getvalue())
+
+    def test_collect_orphans_forgets_missing_sources(self):
+        """collect_orphans удаляет миниатюры и записи картинок, которых
+        уже нет в хранилище.
+        """
+        cache.clear()
+        post = self.create_post('котик.gif')
+        gone = post.image.name
+        thumbnails.generate(gone)
+        thumbnail = default.kvstore._get(
+            default.kvstore._get(
+                ImageFile(gone).key, identity='thumbnails'
+            )[0]
+        )
+        Post.objects.filter(pk=post.pk).update(image='')
+        self.storage.delete(gone)
+        kept = self.storage.save('posts/пост.gif', ContentFile(
+            SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\xFE\xFE\xFE', 1)
+        ))
+        Post.objects.create(author=self.author, text='Пост', image=kept)
+        thumbnails.generate(kept)
+        stdout = StringIO()
+
+        call_command('collect_orphans', stdout=stdout)
+
+        self.assertIsNone(default.kvstore.get(ImageFile(gone)))
+        self.assertIsNone(cache.get(thumbnails.cache_key(gone)))
+        self.assertFalse(thumbnail.exists())
+        self.assertIsNotNone(default.kvstore.get(ImageFile(kept)))
+        self.assertIsNotNone(cache.get(thumbnails.cache_key(kept)))
+        self.assertIn(
+            'Удалены миниатюры пропавших картинок: 1', stdout.getvalue()
+        )
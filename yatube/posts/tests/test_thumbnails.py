@@ -0,0 +1,170 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import thumbnails
+from posts.management.commands.warm_thumbnails import CHECKPOINT_KEY
+from posts.models import Post, User
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post_author = Client()
+        self.post_author.force_login(self.author)
+
+    def create_post(self, color=0):
+        """Пост с картинкой; разные цвета дают разные файлы."""
+        image = BytesIO()
+        Image.new('L', (2, 1), color).save(image, 'GIF')
+        with mock.patch('posts.thumbnails.transaction.on_commit'):
+            return Post.objects.create(
+                author=self.author,
+                text='Тестовый пост',
+                image=SimpleUploadedFile(
+                    name='small.gif',
+                    content=image.getvalue(),
+                    content_type='image/gif',
+                ),
+            )
+
+    def has_thumbnail(self, post):
+        return default.kvstore.get(ImageFile(post.image.name)) is not None
+
+    @override_settings(THUMBNAIL_BACKGROUND=False)
+    def test_saved_post_thumbnail_created_after_commit(self):
+        """Миниатюра нового поста создаётся после фиксации транзакции."""
+        with mock.patch(
+            'posts.thumbnails.transaction.on_commit'
+        ) as on_commit:
+            post = Post.objects.create(
+                author=self.author,
+                text='Тестовый пост',
+                image=SimpleUploadedFile(
+                    name='small.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            )
+        self.assertFalse(self.has_thumbnail(post))
+        on_commit.call_args[0][0]()
+        self.assertTrue(self.has_thumbnail(post))
+
+    def test_warm_thumbnails(self):
+        """Команда warm_thumbnails создаёт миниатюры всех постов."""
+        posts = [self.create_post(i) for i in range(3)]
+        Post.objects.create(author=self.author, text='Без картинки')
+        stdout = StringIO()
+        call_command('warm_thumbnails', workers=1, stdout=stdout)
+        for post in posts:
+            self.assertTrue(self.has_thumbnail(post))
+        self.assertIn('обработано 3 из 3', stdout.getvalue())
+        self.assertIsNone(cache.get(CHECKPOINT_KEY))
+
+    def test_warm_thumbnails_resume(self):
+        """С --resume команда продолжает после сохранённого поста."""
+        first, second = self.create_post(1), self.create_post(2)
+        cache.set(CHECKPOINT_KEY, first.pk, None)
+        call_command(
+            'warm_thumbnails', workers=1, resume=True, stdout=StringIO()
+        )
+        self.assertFalse(self.has_thumbnail(first))
+        self.assertTrue(self.has_thumbnail(second))
+
+    def test_post_form_stores_image_size(self):
+        """Форма поста сохраняет размеры загруженной картинки."""
+        self.post_author.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Тестовый пост',
+                'image': SimpleUploadedFile(
+                    name='small.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            },
+        )
+        post = Post.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+
+    def test_attach_reads_page_thumbnails_at_once(self):
+        """Миниатюры страницы берутся из кэша одним запросом."""
+        posts = [self.create_post(i) for i in range(3)]
+        cache.clear()
+        for post in posts[:2]:
+            thumbnails.generate(post.image.name)
+        with mock.patch(
+            'posts.thumbnails.cache.get_many', wraps=cache.get_many
+        ) as get_many, mock.patch(
+            'posts.thumbnails.transaction.on_commit'
+        ) as on_commit:
+            thumbnails.attach(posts)
+        get_many.assert_called_once()
+        on_commit.assert_called_once()
+        self.assertEqual(posts[0].thumbnail['width'], 960)
+        self.assertIsNone(posts[2].thumbnail)
+
+    def test_feed_renders_thumbnail_or_original(self):
+        """Лента выводит готовую миниатюру, а до неё — исходную картинку."""
+        post = self.create_post()
+        response = self.post_author.get(reverse('posts:index'))
+        self.assertContains(response, post.image.url)
+        thumbnails.generate(post.image.name)
+        response = self.post_author.get(reverse('posts:index'))
+        self.assertContains(
+            response, cache.get(thumbnails.cache_key(post.image.name))['url']
+        )
+
+    def test_generate_creates_responsive_variants(self):
+        """Для картинки создаются WebP-варианты и встроенная заглушка."""
+        post = self.create_post()
+        thumbnails.generate(post.image.name)
+        entry = cache.get(thumbnails.cache_key(post.image.name))
+        for width in thumbnails.VARIANT_WIDTHS:
+            self.assertRegex(entry['srcset'], rf'\.webp {width}w')
+        self.assertTrue(
+            entry['placeholder'].startswith('data:image/jpeg;base64,')
+        )
+        response = self.post_author.get(reverse('posts:index'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_deferred_until_request_finished(self):
+        """Внутри запроса миниатюра создаётся после его завершения."""
+        post = self.create_post()
+        thumbnails.start_request()
+        thumbnails.defer(post.image.name)
+        self.assertFalse(self.has_thumbnail(post))
+        thumbnails.finish_request()
+        self.assertTrue(self.has_thumbnail(post))
@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.another_author = User.objects.create_user(username='another')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        """Подписка переносит посты автора в ленту подписчика."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author})
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.user, post=self.post
+            ).exists()
+        )
+        self.assertEqual(self.feed(), [self.post])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост автора попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = self.author.posts.create(text='Новый пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.user, post=new_post
+            ).exists()
+        )
+        self.assertEqual(self.feed(), [new_post, self.post])
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': self.author})
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.user).exists()
+        )
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_posts_are_pulled(self):
+        """Посты автора с множеством подписчиков подтягиваются при чтении."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.another_author, author=self.author)
+        new_post = self.author.posts.create(text='Новый пост')
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=new_post).exists()
+        )
+        self.assertEqual(self.feed(), [new_post, self.post])
+
+    def test_feed_is_index_range_read(self):
+        """Лента подписок читается по индексу записей ленты без сортировки."""
+        Follow.objects.create(user=self.user, author=self.author)
+        sql, params = timeline.get_feed(
+            self.user
+        )[:10].query.sql_with_params()
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in db_cursor.fetchall())
+        self.assertIn('INDEX timeline_user_pub_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
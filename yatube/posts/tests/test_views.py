@@ -1,11 +1,14 @@
 import shutil
 import tempfile
+from http import HTTPStatus
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from posts.models import Comment, Follow, Group, Post, User
 
@@ -14,6 +17,7 @@ TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 COUNT_TEST_POSTS = 13
 POSTS_ON_PAGE = 10
 POSTS_ON_SECOND_PAGE = 3
+COMMENTS_ON_PAGE = 20
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -163,7 +167,7 @@ class PostPagesTests(TestCase):
             response.context['post'].author.username, self.author.username
         )
         self.assertEqual(
-            response.context['post'].image, 'posts/small.gif'
+            response.context['post'].image, self.post.image
         )
         self.assertEqual(
             response.context['post'].comments.latest('id'), self.comment_post
@@ -212,23 +216,40 @@ class PostPagesTests(TestCase):
 
     def test_index_caches(self):
         """Тестирование кэша главной страницы."""
-        self.new_post = Post.objects.create(
-            author=self.author,
-            text='Пост тестирования кэша'
-        )
+        cache.clear()
         response_1 = self.post_author.get(
             reverse('posts:index')
         )
-        self.new_post.delete()
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Изменено в обход сигналов'
+        )
         response_2 = self.post_author.get(
             reverse('posts:index')
         )
         self.assertEqual(response_1.content, response_2.content)
-        cache.clear()
+        self.new_post = Post.objects.create(
+            author=self.author,
+            text='Пост тестирования кэша'
+        )
         response_3 = self.post_author.get(
             reverse('posts:index')
         )
         self.assertNotEqual(response_2.content, response_3.content)
+        self.assertContains(response_3, self.new_post.text)
+        self.new_post.delete()
+        response_4 = self.post_author.get(
+            reverse('posts:index')
+        )
+        self.assertNotContains(response_4, self.new_post.text)
+
+    def test_index_cache_varies_by_audience(self):
+        """Гость и авторизованный пользователь получают разные
+        варианты кэша главной страницы.
+        """
+        cache.clear()
+        self.post_author.get(reverse('posts:index'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, reverse('posts:follow_index'))
 
     def test_follow(self):
         """Тестирование: подписка на автора создаёт запись в БД."""
@@ -304,7 +325,11 @@ class PaginatorViewsTest(TestCase):
             ])
 
     def setUp(self):
-        """Создание клиента автора постов."""
+        """Создание клиента автора постов.
+        Посты созданы через bulk_create, поэтому кэш числа записей
+        лент сбрасывается вручную.
+        """
+        cache.clear()
         self.post_author = Client()
         self.post_author.force_login(self.author)
 
@@ -330,3 +355,219 @@ class PaginatorViewsTest(TestCase):
                     self.assertEqual(len(
                         response.context['page_obj']), num_of_posts
                     )
+
+
+class CommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+        Comment.objects.bulk_create(
+            Comment(
+                author=cls.author,
+                post=cls.post,
+                text=f'Комментарий № {i}',
+            )
+            for i in range(COMMENTS_ON_PAGE + 5)
+        )
+        cls.url = reverse('posts:post_detail', kwargs={'post_id': cls.post.id})
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_shows_latest_comments(self):
+        """На странице поста только последние комментарии и ссылка
+        на более ранние.
+        """
+        response = self.guest_client.get(self.url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_ON_PAGE)
+        self.assertEqual(
+            comments[0], self.post.comments.order_by('-pub_date', '-pk')[0]
+        )
+        self.assertContains(
+            response,
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id})
+            + f'?cursor={comments.next_cursor}',
+        )
+
+    def test_comments_fragment_loads_older_comments(self):
+        """Фрагмент по курсору отдаёт оставшиеся комментарии без
+        страницы поста вокруг.
+        """
+        response = self.guest_client.get(self.url)
+        cursor = response.context['comments'].next_cursor
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+            {'cursor': cursor},
+        )
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertFalse(response.context['comments'].has_next())
+        self.assertContains(response, 'Комментарий № 0')
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        """Число запросов страницы поста не зависит от числа
+        комментариев.
+        """
+        with CaptureQueriesContext(connection) as before:
+            self.guest_client.get(self.url)
+        Comment.objects.bulk_create(
+            Comment(author=self.author, post=self.post, text='Ещё')
+            for _ in range(COMMENTS_ON_PAGE)
+        )
+        cache.clear()
+        with CaptureQueriesContext(connection) as after:
+            self.guest_client.get(self.url)
+        self.assertEqual(len(after), len(before))
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+            group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.author}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Неизменившаяся страница отвечает 304 по ETag."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_changes_refresh_validators(self):
+        """Новый комментарий меняет ETag страниц с постом."""
+        etags = {
+            url: self.authorized_client.get(url)['ETag'] for url in self.urls
+        }
+        Comment.objects.create(
+            author=self.user, post=self.post, text='Тестовый комментарий'
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_new_login_refreshes_csrf_token(self):
+        """После нового входа страница с формой отдаётся заново, и
+        комментарий отправляется с новым токеном CSRF.
+        """
+        self.user.set_password('password')
+        self.user.save()
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        client.login(username='user', password='password')
+        etag = client.get(url)['ETag']
+        client.logout()
+        client.login(username='user', password='password')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {
+                'text': 'Комментарий',
+                'csrfmiddlewaretoken': response.context['csrf_token'],
+            },
+        )
+        self.assertRedirects(response, url)
+
+    def test_guest_last_modified(self):
+        """Гость получает 304 по Last-Modified."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_cache_headers(self):
+        """Заголовки кэширования зависят от пользователя."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                guest_response = self.client.get(url)
+                user_response = self.authorized_client.get(url)
+                self.assertIn('public', guest_response['Cache-Control'])
+                self.assertIn('private', user_response['Cache-Control'])
+                self.assertIn('Cookie', user_response['Vary'])
+                self.assertNotEqual(
+                    guest_response['ETag'], user_response['ETag']
+                )
+                self.assertFalse(user_response.has_header('Last-Modified'))
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post_author = Client()
+        self.post_author.force_login(self.author)
+
+    def test_card_is_reused_across_feeds(self):
+        """Карточка поста, отрисованная на главной, берётся из кэша
+        в ленте подписок.
+        """
+        self.authorized_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Изменено в обход сигналов'
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, self.post.text)
+
+    def test_post_edit_invalidates_card(self):
+        """Редактирование поста обновляет его карточку."""
+        self.authorized_client.get(reverse('posts:follow_index'))
+        self.post_author.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Отредактированный пост'},
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Отредактированный пост')
+        self.assertNotContains(response, self.post.text)
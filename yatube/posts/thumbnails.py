@@ -0,0 +1,182 @@
+import base64
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts import fragments
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Миниатюра картинки в карточке и на странице поста.
+WIDTH, HEIGHT = 960, 339
+OPTIONS = {'crop': 'center', 'upscale': True}
+# Ширины вариантов для srcset; самый широкий совпадает с миниатюрой.
+VARIANT_WIDTHS = (320, 640, 960)
+VARIANT_OPTIONS = {'format': 'WEBP', 'quality': 80}
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_OPTIONS = {'format': 'JPEG', 'quality': 30}
+GEOMETRY = f'{WIDTH}x{HEIGHT}'
+
+_pending = threading.local()
+
+
+def cache_key(name):
+    return f'thumbnail:{GEOMETRY}:{name}'
+
+
+def geometry(width):
+    return f'{width}x{round(width * HEIGHT / WIDTH)}'
+
+
+def placeholder(name):
+    """Крошечная копия картинки в виде data URI для вывода до загрузки."""
+    thumbnail = get_thumbnail(
+        name,
+        geometry(PLACEHOLDER_WIDTH),
+        **OPTIONS,
+        **PLACEHOLDER_OPTIONS
+    )
+    if not thumbnail.exists():
+        return ''
+    content = base64.b64encode(thumbnail.read()).decode()
+    return f'data:image/jpeg;base64,{content}'
+
+
+def generate(name):
+    """Создаёт миниатюру картинки поста и её варианты, если их ещё нет.
+
+    Кроме миниатюры в исходном формате создаются WebP-варианты для srcset
+    и заглушка для ленивой загрузки. Всё это сохраняется в кэше, откуда
+    attach берёт данные для всей страницы сразу. Фрагменты, отрисованные
+    со старыми данными, устаревают. Возвращает True, когда миниатюра готова.
+    """
+    thumbnail = get_thumbnail(name, GEOMETRY, **OPTIONS)
+    if not thumbnail.exists():
+        return False
+    variants = [
+        get_thumbnail(name, geometry(width), **OPTIONS, **VARIANT_OPTIONS)
+        for width in VARIANT_WIDTHS
+    ]
+    entry = {
+        'url': thumbnail.url,
+        'width': thumbnail.width,
+        'height': thumbnail.height,
+        'srcset': ', '.join(
+            f'{variant.url} {variant.width}w'
+            for variant in variants if variant.exists()
+        ),
+        'placeholder': placeholder(name),
+    }
+    key = cache_key(name)
+    if cache.get(key) != entry:
+        cache.set(key, entry, None)
+        fragments.bump_posts(
+            Post.objects.filter(image=name).values(
+                'pk', 'author_id', 'group_id'
+            )
+        )
+    return True
+
+
+def forget(name):
+    """Удаляет миниатюры картинки и записи о них.
+
+    Возвращает число освобождённых байт.
+    """
+    source = ImageFile(name)
+    freed = 0
+    # У sorl нет публичного списка миниатюр источника; он читается так же,
+    # как в KVStore.delete_thumbnails.
+    for key in default.kvstore._get(source.key, identity='thumbnails') or []:
+        thumbnail = default.kvstore._get(key)
+        if thumbnail and thumbnail.exists():
+            freed += thumbnail.storage.size(thumbnail.name)
+    default.kvstore.delete(source)
+    cache.delete(cache_key(name))
+    return freed
+
+
+def generate_safely(name):
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', name)
+    finally:
+        cache.delete(f'{cache_key(name)}:lock')
+
+
+def start_request():
+    _pending.names = []
+
+
+def finish_request():
+    """Создаёт миниатюры, отложенные до конца запроса.
+
+    Вызывается после отправки ответа, когда сервер закрывает его.
+    """
+    names, _pending.names = getattr(_pending, 'names', None) or [], None
+    for name in names:
+        generate_safely(name)
+
+
+def defer(name):
+    names = getattr(_pending, 'names', None)
+    if names is None:
+        generate_safely(name)
+    else:
+        names.append(name)
+
+
+def schedule(post):
+    if post.image:
+        queue(post.image.name)
+
+
+def queue(name):
+    """Ставит создание миниатюры в очередь после фиксации транзакции.
+
+    Внутри запроса миниатюра создаётся после отправки ответа, и первый
+    посетитель ленты не ждёт ресайза; вне запроса — сразу. Повторная
+    постановка той же картинки, пока первая не обработана, ничего не
+    делает.
+    """
+    if not settings.THUMBNAIL_BACKGROUND:
+        transaction.on_commit(lambda: generate(name))
+    elif cache.add(f'{cache_key(name)}:lock', True,
+                   settings.CACHE_LOCK_TIMEOUT):
+        transaction.on_commit(lambda: defer(name))
+
+
+def lookup(names):
+    """Готовые миниатюры картинок по именам одним запросом к кэшу.
+
+    Для картинки без готовой миниатюры возвращается None, а сама она
+    ставится в очередь.
+    """
+    keys = {cache_key(name): name for name in names if name}
+    found = cache.get_many(keys)
+    entries = {}
+    for key, name in keys.items():
+        entries[name] = found.get(key)
+        if entries[name] is None:
+            queue(name)
+    return entries
+
+
+def attach(posts):
+    """Проставляет постам страницы готовые миниатюры.
+
+    Пост без готовой миниатюры получает thumbnail=None; до её создания
+    шаблон выводит исходную картинку с размерами из поста, не открывая
+    файл.
+    """
+    posts = [post for post in posts if post.image]
+    entries = lookup(post.image.name for post in posts)
+    for post in posts:
+        post.thumbnail = entries[post.image.name]
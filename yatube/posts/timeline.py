@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db.models import F, Q
+
+from posts.models import Follow, Post, TimelineEntry, UserCounter
+
+BATCH_SIZE = 500
+FEED_ORDERING = ('feed_date', 'feed_id')
+
+
+def followers_count(author_id):
+    return UserCounter.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first() or 0
+
+
+def is_pull_author(author_id):
+    """Посты авторов с большим числом подписчиков не раскладываются
+    по лентам, а подтягиваются при чтении.
+    """
+    return followers_count(author_id) > settings.TIMELINE_FANOUT_LIMIT
+
+
+def pull_authors(user):
+    return list(
+        UserCounter.objects.filter(
+            user__following__user=user,
+            followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+        ).values_list('user', flat=True)
+    )
+
+
+def make_entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id,
+        post_id=post.pk,
+        author_id=post.author_id,
+        pub_date=post.pub_date,
+    )
+
+
+def fan_out(post):
+    if is_pull_author(post.author_id):
+        return []
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user', flat=True))
+    TimelineEntry.objects.bulk_create(
+        [make_entry(user_id, post) for user_id in followers],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return followers
+
+
+def backfill(user_id, author_id):
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).only('pk', 'author_id', 'pub_date').order_by()
+    TimelineEntry.objects.bulk_create(
+        (make_entry(user_id, post) for post in posts.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def follow(user_id, author_id):
+    if not is_pull_author(author_id):
+        backfill(user_id, author_id)
+
+
+def unfollow(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    # Автор снова стал обычным: подписчики, пришедшие к нему, пока
+    # его посты подтягивались при чтении, получают их в ленту.
+    if followers_count(author_id) == settings.TIMELINE_FANOUT_LIMIT:
+        followers = Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user', flat=True)
+        for user_id in followers:
+            backfill(user_id, author_id)
+
+
+def get_feed(user):
+    pulled = pull_authors(user)
+    if not pulled:
+        post_list = Post.objects.filter(
+            timeline_entries__user=user
+        ).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_id=F('timeline_entries__post'),
+        )
+    else:
+        post_list = Post.objects.filter(
+            Q(pk__in=TimelineEntry.objects.filter(
+                user=user
+            ).values('post'))
+            | Q(author__in=pulled)
+        ).annotate(feed_date=F('pub_date'), feed_id=F('pk'))
+    return post_list.select_related('author', 'group').order_by(
+        '-feed_date', '-feed_id'
+    )
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from posts import views
+from posts import api, views
 
 app_name = 'posts'
 
@@ -9,6 +9,11 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('search/', views.search, name='search'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments, name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment, name='add_comment'
@@ -33,4 +38,20 @@ urlpatterns = [
         'profile/<str:username>/unfollow/',
         views.profile_unfollow, name='profile_unfollow'
     ),
+    path('export/', views.export_posts, name='export'),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_list'),
+    path(
+        'api/profile/<str:username>/',
+        api.profile, name='api_profile'
+    ),
+    path('api/follow/', api.follow_index, name='api_follow_index'),
+    path(
+        'api/posts/<int:post_id>/',
+        api.post_detail, name='api_post_detail'
+    ),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.post_comments, name='api_post_comments'
+    ),
 ]
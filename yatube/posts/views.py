@@ -1,43 +1,142 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import condition
 
-from posts.forms import CommentForm, PostForm
+from core.decorators import cache_headers
+from core.paginators import CachedCountPaginator, CursorPaginator
+from posts import counters, export, fragments, thumbnails, timeline
+from posts.forms import CommentForm, PostForm, SearchForm
 from posts.models import Follow, Group, Post, User
+from posts.search import SearchPaginator
 
 POSTS_ON_PAGE = 10
+COMMENTS_ON_PAGE = 20
+
+
+def get_comments_page(post, cursor=None):
+    # Комментарии читаются по индексу (post, pub_date) от новых к старым.
+    paginator = CursorPaginator(
+        post.comments.select_related('author'), COMMENTS_ON_PAGE
+    )
+    return paginator.get_page(cursor)
+
+
+def get_page_obj(request, post_list, count_key=None,
+                 cursor_fields=('pub_date', 'pk')):
+    if settings.POSTS_CURSOR_PAGINATION or 'cursor' in request.GET:
+        paginator = CursorPaginator(post_list, POSTS_ON_PAGE, cursor_fields)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    else:
+        paginator = CachedCountPaginator(
+            post_list,
+            POSTS_ON_PAGE,
+            count_key=count_key,
+            count_timeout=settings.FEED_COUNT_TIMEOUT,
+        )
+        page_obj = paginator.get_page(request.GET.get('page'))
+    thumbnails.attach(page_obj)
+    return page_obj
+
+
+def feed_condition(get_feeds):
+    def etag(request, *args, **kwargs):
+        tag = fragments.etag(
+            get_feeds(request, *args, **kwargs), request.user
+        )
+        if not request.user.is_authenticated:
+            return tag
+        # В формах страницы зашит токен CSRF: после нового входа он
+        # другой, и сохранённая в браузере страница устаревает.
+        get_token(request)
+        secret = hashlib.sha256(
+            request.META['CSRF_COOKIE'].encode()
+        ).hexdigest()[:16]
+        return f'{tag}-{secret}'
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return fragments.last_modified(get_feeds(request, *args, **kwargs))
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
 
 
+def index_feeds(request):
+    return [('index',)]
+
+
+def group_feeds(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    return [('group', group_id)]
+
+
+def profile_feeds(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    return [('profile', author_id), ('follows', request.user.pk)]
+
+
+def comment_feeds(request, post_id):
+    return [('post', post_id)]
+
+
+def post_feeds(request, post_id):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    return [('post', post_id), ('profile', author_id)]
+
+
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(index_feeds)
 def index(request):
     post_list = Post.objects.select_related('group', 'author')
-    paginator = Paginator(post_list, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page_obj(
+        request, post_list, counters.feed_count_key('index')
+    )
     context = {
         'page_obj': page_obj,
+        **fragments.context('index'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(group_feeds)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     post_list = group.posts.select_related('author')
-    paginator = Paginator(post_list, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page_obj(
+        request, post_list, counters.feed_count_key('group', group.pk)
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
+        **fragments.context('group', group.pk),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(profile_feeds)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
     posts = author.posts.select_related('group')
-    paginator = Paginator(posts, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page_obj(
+        request, posts, counters.feed_count_key('profile', author.pk)
+    )
     following = (
         request.user.is_authenticated
         and request.user.follower.filter(author=author)
@@ -46,13 +145,19 @@ def profile(request, username):
         'author': author,
         'page_obj': page_obj,
         'following': following,
+        **fragments.context('profile', author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(post_feeds)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.select_related('author')
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'), id=post_id
+    )
+    thumbnails.attach([post])
+    comments = get_comments_page(post, request.GET.get('comments'))
     form = CommentForm()
     context = {
         'post': post,
@@ -62,6 +167,50 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@cache_headers(settings.FEED_MAX_AGE)
+@feed_condition(comment_feeds)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), id=post_id)
+    context = {
+        'post': post,
+        'comments': get_comments_page(post, request.GET.get('cursor')),
+    }
+    return render(request, 'includes/comments.html', context)
+
+
+def search(request):
+    form = SearchForm(request.GET or None)
+    query = None
+    filters = {}
+    if form.is_valid():
+        query = form.cleaned_data['q']
+        if form.cleaned_data['group']:
+            filters['group_id'] = Group.objects.filter(
+                slug=form.cleaned_data['group']
+            ).values_list('pk', flat=True).first()
+        if form.cleaned_data['author']:
+            filters['author_id'] = User.objects.filter(
+                username=form.cleaned_data['author']
+            ).values_list('pk', flat=True).first()
+    # Несуществующие группа или автор не совпадают ни с одним постом.
+    missing = None in filters.values()
+    paginator = SearchPaginator(
+        '' if missing else query or '', POSTS_ON_PAGE, **filters
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    params = {
+        name: value for name, value in request.GET.items()
+        if name in form.fields and value
+    }
+    context = {
+        'form': form,
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': f'{urlencode(params)}&' if params else '',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -77,7 +226,8 @@ def post_create(request):
 
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    with transaction.atomic():
+        post.save()
     return redirect('posts:profile', request.user)
 
 
@@ -100,7 +250,8 @@ def post_edit(request, post_id):
     if not request.method == 'POST' or not form.is_valid():
         return render(request, 'posts/create_post.html', context)
 
-    form.save()
+    with transaction.atomic():
+        form.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -112,16 +263,20 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = timeline.get_feed(request.user)
+    page_obj = get_page_obj(
+        request,
+        post_list,
+        counters.feed_count_key('follow', request.user.pk),
+        cursor_fields=timeline.FEED_ORDERING,
+    )
     context = {
         'page_obj': page_obj,
     }
@@ -147,3 +302,23 @@ def profile_unfollow(request, username):
         author=follow_author
     ).delete()
     return redirect('posts:profile', username)
+
+
+@login_required
+def export_posts(request):
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in export.FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    if request.GET.get('media'):
+        response = StreamingHttpResponse(
+            export.archive(request.user, fmt), content_type='application/zip'
+        )
+        filename = f'{request.user.username}.zip'
+    else:
+        response = StreamingHttpResponse(
+            export.stream(request.user, fmt),
+            content_type=export.FORMATS[fmt],
+        )
+        filename = f'{request.user.username}.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
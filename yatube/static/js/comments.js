@@ -0,0 +1,22 @@
+// Подгружает более ранние комментарии фрагментом на месте кнопки.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('[data-comments-more]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.commentsMore, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.insertAdjacentHTML('beforebegin', html);
+      link.remove();
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
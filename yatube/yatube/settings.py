@@ -1,4 +1,5 @@
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -64,6 +65,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.fragment_cache.fragment_timeout',
             ],
         },
     },
@@ -112,6 +114,8 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static')
 ]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -126,8 +130,57 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIDE = 2560
+
+# Тесты очищают кэш, поэтому у них свой каталог, а не рабочий кэш.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+# Фрагменты, версии лент и миниатюры хранятся без срока, поэтому
+# MAX_ENTRIES рассчитан с запасом: при переполнении удаляется десятая
+# часть записей, начиная с просроченных.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.caching.FileBasedCache',
+        'LOCATION': os.path.join(
+            BASE_DIR, 'test_cache' if TESTING else 'cache'
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            'CULL_FREQUENCY': 10,
+        },
     }
 }
+CACHE_STALE_TIMEOUT = 60
+CACHE_LOCK_TIMEOUT = 10
+
+POSTS_CURSOR_PAGINATION = False
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+FEED_COUNT_TIMEOUT = 60 * 5
+
+ADMIN_COUNT_TIMEOUT = 60
+
+# Фоновые действия админки обрабатывают объекты пачками такого размера.
+BULK_JOB_BATCH_SIZE = 100
+# Столько пачек выполняется сразу после запроса, поставившего действие в
+# очередь: всё это время процесс сервера занят и не принимает запросы.
+# Остальное выполняет команда run_bulk_jobs, запускаемая по расписанию.
+BULK_JOB_REQUEST_BATCHES = 1
+# Действие, не продвигавшееся столько секунд, считается прерванным.
+BULK_JOB_STALE_TIMEOUT = 60 * 5
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+FEED_MAX_AGE = 10
+
+THUMBNAIL_BACKGROUND = True
+
+# Базовая линия микробенчмарков и допустимое замедление лучшего раунда.
+BENCHMARK_BASELINE = os.path.join(BASE_DIR, '.benchmarks', 'baseline.json')
+BENCHMARK_THRESHOLD = 0.2